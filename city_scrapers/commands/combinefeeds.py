@@ -0,0 +1,5 @@
+from city_scrapers_core.commands.combinefeeds import Command as CombineFeedsCommand
+
+
+class Command(CombineFeedsCommand):
+    pass
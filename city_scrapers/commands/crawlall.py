@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.utils.project import data_path
+
+from ..history import CrawlHistory
+from ..utils import json_default
+
+logger = logging.getLogger(__name__)
+
+
+class Command(ScrapyCommand):
+    """Run every spider in the project on a single reactor so that network waits for
+    each agency overlap rather than running one process per spider in sequence.
+    Feeds and stats are still tracked per spider.
+
+    With ``--workers N`` the spiders are split across N worker processes each running
+    this command, so CPU-bound parsing like pdfminer in one worker doesn't stall the
+    reactor for the others. Stats from all workers are merged in the summary.
+
+    Wall times from previous runs are kept in CITY_SCRAPERS_HISTORY_FILE so that the
+    longest spiders are started first and shards are balanced by predicted time.
+    """
+
+    requires_project = True
+
+    def syntax(self):
+        return "[options] [<spider> ...]"
+
+    def short_desc(self):
+        return "Run all spiders (or the ones listed) in a single process"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument(
+            "-x",
+            "--exclude",
+            dest="exclude",
+            action="append",
+            default=[],
+            metavar="SPIDER",
+            help="Spider to skip (can be repeated)",
+        )
+        parser.add_argument(
+            "--stats-file",
+            dest="stats_file",
+            metavar="FILE",
+            help="Write the stats of each spider to FILE as JSON",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Split spiders across N worker processes (default: 1)",
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            dest="concurrency",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Run at most N spiders at once in each process (default: no limit)",
+        )
+        parser.add_argument(
+            "--no-history",
+            dest="history",
+            action="store_false",
+            help="Don't record this run in the crawl history",
+        )
+
+    def run(self, args, opts):
+        if opts.workers < 1:
+            raise UsageError("--workers must be at least 1")
+        if opts.concurrency < 0:
+            raise UsageError("--concurrency can't be negative")
+        history = self.get_history()
+        spider_names = history.order(self.get_spider_names(args, opts.exclude))
+        start_time = time.monotonic()
+        if opts.workers > 1:
+            shards = history.shard(spider_names, opts.workers, opts.concurrency)
+            predicted = max(
+                history.makespan(shard, opts.concurrency) for shard in shards
+            )
+            spider_stats = self.run_workers(shards, opts)
+        else:
+            predicted = history.makespan(spider_names, opts.concurrency)
+            spider_stats = self.run_crawlers(spider_names, opts.concurrency)
+        self.log_summary(spider_stats)
+        logger.info(
+            "Makespan: predicted %.1fs, actual %.1fs",
+            predicted,
+            time.monotonic() - start_time,
+        )
+        if opts.stats_file:
+            self.write_stats(opts.stats_file, spider_stats)
+        if opts.history:
+            history.record(spider_stats)
+            history.save()
+        if self.exitcode == 0 and any(
+            stats.get("finish_reason") != "finished" for stats in spider_stats.values()
+        ):
+            self.exitcode = 1
+
+    def run_crawlers(self, spider_names, concurrency=0):
+        """Run spiders in order on the shared reactor with at most `concurrency`
+        running at once, returning stats for each one
+        """
+        pending = list(spider_names)
+        crawlers = {}
+
+        def crawl_next(result=None):
+            if pending:
+                name = pending.pop(0)
+                crawler = self.create_crawler(name)
+                crawlers[name] = crawler
+                self.crawler_process.crawl(crawler).addBoth(crawl_next)
+            return result
+
+        for _ in range(concurrency or len(pending)):
+            crawl_next()
+        self.crawler_process.start()
+        if self.crawler_process.bootstrap_failed:
+            self.exitcode = 1
+        return {
+            name: crawler.stats.get_stats() if crawler.stats else {}
+            for name, crawler in crawlers.items()
+        }
+
+    def run_workers(self, shards, opts):
+        """Run each shard of spiders in its own crawlall process and merge the stats
+        each worker writes once it's done. Workers inherit the environment, so feeds
+        use the same FEED_URI layout as a single process.
+        """
+        spider_stats = {}
+        with TemporaryDirectory() as tmp_dir:
+            workers = []
+            for idx, shard in enumerate(shards):
+                stats_path = os.path.join(tmp_dir, "worker-{}.json".format(idx))
+                logger.info("Starting worker %d: %s", idx, ", ".join(shard))
+                workers.append(
+                    (
+                        stats_path,
+                        subprocess.Popen(self.get_worker_args(shard, stats_path, opts)),
+                    )
+                )
+            for stats_path, proc in workers:
+                if proc.wait() != 0:
+                    self.exitcode = 1
+                if os.path.exists(stats_path):
+                    with open(stats_path) as f:
+                        spider_stats.update(json.load(f))
+        return spider_stats
+
+    def get_worker_args(self, spider_names, stats_path, opts):
+        args = [sys.executable, "-m", "scrapy", "crawlall", *spider_names]
+        args.extend(["--stats-file", stats_path, "--no-history"])
+        if opts.concurrency:
+            args.extend(["--concurrency", str(opts.concurrency)])
+        for setting in opts.set:
+            args.extend(["-s", setting])
+        if opts.loglevel:
+            args.extend(["-L", opts.loglevel])
+        if opts.nolog:
+            args.append("--nolog")
+        return args
+
+    def create_crawler(self, name):
+        """Create a crawler, using a separate JOBDIR for each spider if
+        CITY_SCRAPERS_JOBDIR is set
+        """
+        crawler = self.crawler_process.create_crawler(name)
+        jobdir = self.settings.get("CITY_SCRAPERS_JOBDIR")
+        if jobdir:
+            crawler.settings.set(
+                "JOBDIR", data_path(os.path.join(jobdir, name)), priority="cmdline"
+            )
+        return crawler
+
+    def get_history(self):
+        return CrawlHistory(data_path(self.settings.get("CITY_SCRAPERS_HISTORY_FILE")))
+
+    def get_spider_names(self, args, exclude):
+        """Get the spiders to run, preserving the order they were listed in"""
+        spider_list = self.crawler_process.spider_loader.list()
+        unknown = [name for name in args + exclude if name not in spider_list]
+        if len(unknown) > 0:
+            raise UsageError("Unknown spiders: {}".format(", ".join(unknown)))
+        return [name for name in args or spider_list if name not in exclude]
+
+    def log_summary(self, spider_stats):
+        totals = {}
+        for name, stats in sorted(spider_stats.items()):
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = totals.get(key, 0) + value
+            self.log_spider_stats(name, stats)
+        logger.info(
+            "Total: %d spiders, %d items, %d requests, %d errors",
+            len(spider_stats),
+            totals.get("item_scraped_count", 0),
+            totals.get("downloader/request_count", 0),
+            totals.get("log_count/ERROR", 0),
+        )
+        self.log_slot_summary(spider_stats)
+
+    def log_slot_summary(self, spider_stats):
+        """Log the throughput of each download slot across all spiders"""
+        slots = {}
+        for stats in spider_stats.values():
+            for key, value in stats.items():
+                if not key.startswith("slot/"):
+                    continue
+                slot_key, stat = key[len("slot/") :].rsplit("/", 1)
+                slot = slots.setdefault(slot_key, {})
+                if stat == "active_seconds":
+                    slot[stat] = max(slot.get(stat, 0), value)
+                else:
+                    slot[stat] = slot.get(stat, 0) + value
+        for slot_key, slot in sorted(
+            slots.items(), key=lambda item: -item[1].get("response_count", 0)
+        ):
+            responses = slot.get("response_count", 0)
+            logger.info(
+                "Slot %s: %d responses, %.2f MB, %.2f responses/s, %.2fs latency",
+                slot_key,
+                responses,
+                slot.get("response_bytes", 0) / 1024**2,
+                responses / max(slot.get("active_seconds", 0), 1),
+                slot.get("latency_seconds", 0) / max(responses, 1),
+            )
+
+    def log_spider_stats(self, name, stats):
+        elapsed = stats.get("elapsed_time_seconds")
+        logger.info(
+            "%s: %s, %d items, %d requests, %s",
+            name,
+            stats.get("finish_reason", "not started"),
+            stats.get("item_scraped_count", 0),
+            stats.get("downloader/request_count", 0),
+            "{:.1f}s".format(elapsed) if elapsed is not None else "-",
+        )
+
+    def write_stats(self, path, spider_stats):
+        with open(path, "w") as f:
+            json.dump(spider_stats, f, default=json_default, indent=2, sort_keys=True)
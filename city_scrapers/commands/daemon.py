@@ -0,0 +1,75 @@
+import logging
+import time
+
+from scrapy.commands import ScrapyCommand
+
+from .crawlall import Command as CrawlAllCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(CrawlAllCommand):
+    """
+    Keep a single reactor running and crawl each spider again once its interval has
+    passed since its last run started. Intervals are recommended by the crawl history
+    from how often each spider's output changes, between
+    CITY_SCRAPERS_DAEMON_MIN_INTERVAL and CITY_SCRAPERS_DAEMON_MAX_INTERVAL seconds and
+    starting from CITY_SCRAPERS_DAEMON_INTERVAL. Intervals for individual spiders can
+    be fixed in CITY_SCRAPERS_DAEMON_INTERVALS.
+
+    Each run creates a new crawler, so feeds are written to a new FEED_URI path, while
+    the DNS cache, parsed robots.txt files and AutoThrottle delays are kept in memory
+    between runs.
+    """
+
+    def short_desc(self):
+        return "Run spiders repeatedly on their own intervals in one process"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument(
+            "-x",
+            "--exclude",
+            dest="exclude",
+            action="append",
+            default=[],
+            metavar="SPIDER",
+            help="Spider to skip (can be repeated)",
+        )
+
+    def run(self, args, opts):
+        self.history = self.get_history()
+        for name in self.history.order(self.get_spider_names(args, opts.exclude)):
+            self.crawl(name)
+        self.crawler_process.start(stop_after_crawl=False)
+
+    def get_interval(self, name):
+        fixed_intervals = self.settings.getdict("CITY_SCRAPERS_DAEMON_INTERVALS")
+        if name in fixed_intervals:
+            return fixed_intervals[name]
+        return self.history.interval(
+            name,
+            self.settings.getfloat("CITY_SCRAPERS_DAEMON_INTERVAL"),
+            self.settings.getfloat("CITY_SCRAPERS_DAEMON_MIN_INTERVAL"),
+            self.settings.getfloat("CITY_SCRAPERS_DAEMON_MAX_INTERVAL"),
+        )
+
+    def crawl(self, name):
+        crawler = self.create_crawler(name)
+        start_time = time.monotonic()
+        self.crawler_process.crawl(crawler).addBoth(
+            self.crawl_finished, name, crawler, start_time
+        )
+
+    def crawl_finished(self, result, name, crawler, start_time):
+        from twisted.internet import reactor
+
+        spider_stats = {name: crawler.stats.get_stats() if crawler.stats else {}}
+        self.log_spider_stats(name, spider_stats[name])
+        self.history.record(spider_stats)
+        self.history.save()
+
+        delay = max(self.get_interval(name) - (time.monotonic() - start_time), 0)
+        logger.info("Next %s run in %.0fs", name, delay)
+        reactor.callLater(delay, self.crawl, name)
+        return result
@@ -0,0 +1,71 @@
+from scrapy.commands import ScrapyCommand
+
+from ..workqueue import SpiderQueue
+from .crawlall import Command as CrawlAllCommand
+
+
+class Command(CrawlAllCommand):
+    """
+    Fill the shared spider queue for ``scrapy queueworker`` processes with all spiders
+    (or the ones listed), longest first according to the crawl history. With
+    ``--status`` the state of each queued spider and the stats reported by workers are
+    logged instead.
+    """
+
+    def short_desc(self):
+        return "Queue spiders for queueworker processes, or show queue status"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument(
+            "-x",
+            "--exclude",
+            dest="exclude",
+            action="append",
+            default=[],
+            metavar="SPIDER",
+            help="Spider to skip (can be repeated)",
+        )
+        parser.add_argument(
+            "--queue",
+            dest="queue",
+            metavar="FILE",
+            help="Queue file (default: CITY_SCRAPERS_QUEUE_FILE setting)",
+        )
+        parser.add_argument(
+            "--status",
+            dest="status",
+            action="store_true",
+            help="Show the queue status and worker stats instead of filling it",
+        )
+        parser.add_argument(
+            "--stats-file",
+            dest="stats_file",
+            metavar="FILE",
+            help="With --status, write the stats of each spider to FILE as JSON",
+        )
+
+    def run(self, args, opts):
+        queue = SpiderQueue.from_settings(self.settings, path=opts.queue)
+        if opts.status:
+            self.log_status(queue, opts)
+        else:
+            spider_names = self.get_history().order(
+                self.get_spider_names(args, opts.exclude)
+            )
+            queue.put(spider_names)
+            print("Queued {} spiders in {}".format(len(spider_names), queue.path))
+        queue.close()
+
+    def log_status(self, queue, opts):
+        jobs = queue.jobs()
+        for job in jobs:
+            print(
+                "{spider}: {state}, {attempts} attempts, worker {worker}".format(**job)
+            )
+        spider_stats = {job["spider"]: job["stats"] for job in jobs if job["stats"]}
+        self.log_summary(spider_stats)
+        if opts.stats_file:
+            self.write_stats(opts.stats_file, spider_stats)
+        if not queue.is_finished() or len(spider_stats) < len(jobs):
+            self.exitcode = 1
@@ -0,0 +1,11 @@
+from city_scrapers_core.commands.genspider import Command as GenSpiderCommand
+
+from ..spiderloader import write_manifest
+
+
+class Command(GenSpiderCommand):
+    def run(self, args, opts):
+        super().run(args, opts)
+        # Spiders are only listed once they're in the manifest
+        if self.settings.get("NEWSPIDER_MODULE"):
+            write_manifest(self.settings["NEWSPIDER_MODULE"])
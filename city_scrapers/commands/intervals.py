@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from .daemon import Command as DaemonCommand
+
+
+class Command(DaemonCommand):
+    """
+    Print the interval ``scrapy daemon`` would use for each spider along with the
+    number of output changes recorded in the crawl history it's based on.
+    """
+
+    default_settings = {"LOG_ENABLED": False}
+
+    def short_desc(self):
+        return "Show the recommended interval between runs of each spider"
+
+    def run(self, args, opts):
+        self.history = self.get_history()
+        for name in sorted(self.get_spider_names(args, opts.exclude)):
+            changes = self.history.changes.get(name)
+            if changes:
+                observed_days = (
+                    datetime.now() - datetime.fromisoformat(changes["since"])
+                ).total_seconds() / 86400
+                details = "{} changes in {:.1f} days".format(
+                    len(changes["times"]), observed_days
+                )
+            else:
+                details = "no output history"
+            print(
+                "{}: {:.1f} hours ({})".format(
+                    name, self.get_interval(name) / 3600, details
+                )
+            )
@@ -0,0 +1,18 @@
+from scrapy.commands import ScrapyCommand
+
+from ..spiderloader import write_manifest
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    default_settings = {"LOG_ENABLED": False}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Regenerate the spider manifest used to load spiders lazily"
+
+    def run(self, args, opts):
+        for module_name in self.settings.getlist("SPIDER_MODULES"):
+            print(write_manifest(module_name))
@@ -0,0 +1,116 @@
+import logging
+import os
+import socket
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from twisted.internet.task import LoopingCall
+
+from ..workqueue import SpiderQueue
+from .crawlall import Command as CrawlAllCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(CrawlAllCommand):
+    """
+    Pull spiders from the shared queue filled by ``scrapy enqueue`` and crawl them
+    until the queue is finished. Any number of workers can share a queue file on the
+    same host or a shared filesystem. Leases are extended with heartbeats while a
+    spider runs, and the stats of each crawl are stored in the queue.
+    """
+
+    def short_desc(self):
+        return "Crawl spiders from the shared queue until it's finished"
+
+    def syntax(self):
+        return "[options]"
+
+    def add_options(self, parser):
+        ScrapyCommand.add_options(self, parser)
+        parser.add_argument(
+            "--queue",
+            dest="queue",
+            metavar="FILE",
+            help="Queue file (default: CITY_SCRAPERS_QUEUE_FILE setting)",
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            dest="concurrency",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Run at most N spiders at once (default: 1)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            dest="poll_interval",
+            type=float,
+            default=10,
+            metavar="SECONDS",
+            help="Seconds between checks for expired leases when the queue is empty",
+        )
+
+    def run(self, args, opts):
+        if opts.concurrency < 1:
+            raise UsageError("--concurrency must be at least 1")
+        self.opts = opts
+        self.worker_id = "{}:{}".format(socket.gethostname(), os.getpid())
+        self.queue = SpiderQueue.from_settings(self.settings, path=opts.queue)
+        self.active = set()
+        self.heartbeat_loop = None
+        self.lease_spiders()
+        if not self.queue.is_finished():
+            self.crawler_process.start(stop_after_crawl=False)
+        self.queue.close()
+
+    def lease_spiders(self):
+        """Start crawls until the concurrency limit is hit or the queue is empty, and
+        stop once all queued spiders are finished
+        """
+        from twisted.internet import reactor
+
+        while len(self.active) < self.opts.concurrency:
+            spider_name = self.queue.lease(self.worker_id)
+            if spider_name is None:
+                break
+            self.crawl(spider_name)
+        if self.active:
+            return
+        if self.queue.is_finished():
+            logger.info("Queue is finished, stopping worker %s", self.worker_id)
+            if self.heartbeat_loop and self.heartbeat_loop.running:
+                self.heartbeat_loop.stop()
+            if reactor.running:
+                reactor.stop()
+        else:
+            # Other workers hold leases that could expire if they die
+            reactor.callLater(self.opts.poll_interval, self.lease_spiders)
+
+    def crawl(self, spider_name):
+        logger.info("Worker %s leased %s", self.worker_id, spider_name)
+        self.active.add(spider_name)
+        crawler = self.create_crawler(spider_name)
+        self.crawler_process.crawl(crawler).addBoth(
+            self.crawl_finished, spider_name, crawler
+        )
+        # Created after the first crawl so that the crawler installs the reactor
+        if self.heartbeat_loop is None:
+            self.heartbeat_loop = LoopingCall(self.heartbeat)
+            self.heartbeat_loop.start(self.queue.lease_seconds / 3, now=False)
+
+    def crawl_finished(self, result, spider_name, crawler):
+        stats = crawler.stats.get_stats() if crawler.stats else {}
+        self.log_spider_stats(spider_name, stats)
+        self.queue.complete(self.worker_id, spider_name, stats)
+        self.active.discard(spider_name)
+        self.lease_spiders()
+        return result
+
+    def heartbeat(self):
+        for spider_name in self.active:
+            if not self.queue.heartbeat(self.worker_id, spider_name):
+                logger.warning(
+                    "Worker %s lost its lease on %s", self.worker_id, spider_name
+                )
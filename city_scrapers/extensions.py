@@ -0,0 +1,266 @@
+import json
+import os
+import resource
+import sys
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.project import data_path
+
+
+class ThrottleStateExtension:
+    """
+    Keeps the delay AutoThrottle has adjusted each download slot to and starts the same
+    slot at that delay in later crawls. Spiders sharing hosts in ``scrapy crawlall``
+    and repeated runs in ``scrapy daemon`` don't need to start over from
+    AUTOTHROTTLE_START_DELAY.
+
+    Delays and average latencies are also saved to CITY_SCRAPERS_THROTTLE_STATE_FILE
+    when each spider closes, so short crawls in later processes start at the pace
+    of the last run. Saved slots older than CITY_SCRAPERS_THROTTLE_STATE_MAX_AGE
+    seconds are ignored.
+    """
+
+    slot_state = {}
+    loaded_paths = set()
+
+    def __init__(self, crawler):
+        if not crawler.settings.getbool("AUTOTHROTTLE_ENABLED"):
+            raise NotConfigured
+        self.crawler = crawler
+        self.min_delay = crawler.settings.getfloat("DOWNLOAD_DELAY")
+        self.max_delay = crawler.settings.getfloat("AUTOTHROTTLE_MAX_DELAY")
+        self.max_age = crawler.settings.getfloat("CITY_SCRAPERS_THROTTLE_STATE_MAX_AGE")
+        self.seen_slots = set()
+        self.state_path = None
+        state_file = crawler.settings.get("CITY_SCRAPERS_THROTTLE_STATE_FILE")
+        if state_file:
+            self.state_path = data_path(state_file)
+            if self.state_path not in self.loaded_paths:
+                self.loaded_paths.add(self.state_path)
+                for key, state in self.load_state().items():
+                    self.slot_state.setdefault(key, state)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(
+            ext.request_reached_downloader, signal=signals.request_reached_downloader
+        )
+        crawler.signals.connect(
+            ext.response_downloaded, signal=signals.response_downloaded
+        )
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def request_reached_downloader(self, request, spider):
+        """Set the starting delay of a slot the first time it's used"""
+        key, slot = self._get_slot(request)
+        if key in self.seen_slots or slot is None:
+            return
+        self.seen_slots.add(key)
+        state = self.slot_state.get(key)
+        if state is None or (
+            self.max_age and time.time() - state["updated"] > self.max_age
+        ):
+            return
+        slot.delay = min(max(self.min_delay, state["delay"]), self.max_delay)
+        spider.logger.debug(
+            "Starting slot %s at %.2fs delay (%.2fs latency)",
+            key,
+            slot.delay,
+            state["latency"],
+        )
+
+    def response_downloaded(self, response, request, spider):
+        """Save the delay after AutoThrottle adjusts it for the latest response"""
+        key, slot = self._get_slot(request)
+        latency = request.meta.get("download_latency")
+        if slot is None or latency is None:
+            return
+        prev_latency = self.slot_state.get(key, {}).get("latency", latency)
+        self.slot_state[key] = {
+            "delay": slot.delay,
+            "latency": (prev_latency + latency) / 2,
+            "updated": time.time(),
+        }
+
+    def spider_closed(self, spider):
+        """Save the slots used by this spider, keeping newer state saved by other
+        processes since this one started
+        """
+        if not self.state_path or not self.seen_slots:
+            return
+        state = self.load_state()
+        for key in self.seen_slots:
+            if key in self.slot_state and self.slot_state[key]["updated"] > state.get(
+                key, {}
+            ).get("updated", 0):
+                state[key] = self.slot_state[key]
+        tmp_path = "{}.{}.tmp".format(self.state_path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _get_slot(self, request):
+        key = request.meta.get("download_slot")
+        return key, self.crawler.engine.downloader.slots.get(key)
+
+
+class OutputChangesExtension:
+    """
+    Compares the meeting IDs and links a spider yields with its previous finished run
+    without errors and sets the number added and removed in the output/added_count and
+    output/removed_count stats. CrawlHistory uses these to track how often each
+    source changes. The output of the last run is kept in CITY_SCRAPERS_OUTPUT_DIR.
+    """
+
+    def __init__(self, crawler, state_dir):
+        self.crawler = crawler
+        self.state_dir = state_dir
+        self.keys = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        state_dir = crawler.settings.get("CITY_SCRAPERS_OUTPUT_DIR")
+        if not state_dir:
+            raise NotConfigured
+        ext = cls(crawler, data_path(state_dir, createdir=True))
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def item_scraped(self, item, spider):
+        item_id = item.get("id")
+        if not item_id:
+            return
+        self.keys.add(item_id)
+        for link in item.get("links") or []:
+            self.keys.add("{} {}".format(item_id, link.get("href")))
+
+    def spider_closed(self, spider, reason):
+        # Partial runs would look like removed meetings, including runs that finish
+        # normally after every request failed
+        if (
+            reason != "finished"
+            or self.crawler.stats.get_value("log_count/ERROR")
+            or not self.keys
+        ):
+            return
+        path = os.path.join(self.state_dir, "{}.json".format(spider.name))
+        if os.path.exists(path):
+            with open(path) as f:
+                prev_keys = set(json.load(f))
+            stats = self.crawler.stats
+            stats.set_value("output/added_count", len(self.keys - prev_keys))
+            stats.set_value("output/removed_count", len(prev_keys - self.keys))
+        with open(path, "w") as f:
+            json.dump(sorted(self.keys), f)
+
+
+def get_rss_mb():
+    """Current resident set size of this process in MB, falling back to the peak size
+    on platforms without /proc
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024**2
+    except OSError:
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KB elsewhere
+    return max_rss / 1024 ** (2 if sys.platform == "darwin" else 1)
+
+
+class BudgetExtension:
+    """
+    Closes a spider while the process uses more than CITY_SCRAPERS_MEMORY_BUDGET_MB
+    of memory, so one agency with huge documents can't exhaust memory on a small
+    runner. Time limits use Scrapy's CLOSESPIDER_TIMEOUT instead.
+
+    Memory is the resident size of the whole process, checked every
+    CITY_SCRAPERS_BUDGET_CHECK_INTERVAL seconds. It can't be attributed to a single
+    spider, so the budget is only enforced while the spider is the only one running in
+    its process, like with ``scrapy crawl`` or ``scrapy crawlall --concurrency 1``.
+    Otherwise exceeding it is logged and recorded in budget/memory_exceeded_shared
+    rather than closing every spider in the process.
+
+    The spider is closed like any other finished spider, so items it already scraped
+    are written to its feed. The finish_reason and budget/exceeded stats record that
+    the budget ran out.
+
+    The budget/max_rss_mb and budget/max_response_bytes stats record the largest
+    sampled memory use and response body, to help set DOWNLOAD_MAXSIZE and memory
+    budgets, and memory is sampled even when no budget is set.
+    budget/process_peak_rss_mb is the peak memory of the process since it started,
+    which includes any spiders that ran before in the same process.
+    """
+
+    running = set()
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.memory_budget = crawler.settings.getfloat("CITY_SCRAPERS_MEMORY_BUDGET_MB")
+        self.check_interval = crawler.settings.getfloat(
+            "CITY_SCRAPERS_BUDGET_CHECK_INTERVAL"
+        )
+        self.memory_check = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        from twisted.internet.task import LoopingCall
+
+        self.running.add(self)
+        self.memory_check = LoopingCall(self.check_memory, spider)
+        self.memory_check.start(self.check_interval)
+
+    def spider_closed(self, spider):
+        self.running.discard(self)
+        if self.memory_check and self.memory_check.running:
+            self.memory_check.stop()
+        self.crawler.stats.max_value(
+            "budget/process_peak_rss_mb", round(get_peak_rss_mb())
+        )
+
+    def response_received(self, response, request, spider):
+        self.crawler.stats.max_value("budget/max_response_bytes", len(response.body))
+
+    def check_memory(self, spider):
+        rss = get_rss_mb()
+        self.crawler.stats.max_value("budget/max_rss_mb", round(rss))
+        if not self.memory_budget or rss <= self.memory_budget:
+            return
+        if len(self.running) > 1:
+            if not self.crawler.stats.get_value("budget/memory_exceeded_shared"):
+                spider.logger.warning(
+                    "Process memory budget exceeded with %d spiders running, not "
+                    "closing the spider",
+                    len(self.running),
+                )
+            self.crawler.stats.set_value("budget/memory_exceeded_shared", True)
+            return
+        self.close_spider(spider, "memory")
+
+    def close_spider(self, spider, budget):
+        self.spider_closed(spider)
+        spider.logger.warning("Closing spider after exceeding its %s budget", budget)
+        self.crawler.stats.set_value("budget/exceeded", budget)
+        self.crawler.engine.close_spider(spider, "{}_budget_exceeded".format(budget))
@@ -0,0 +1,126 @@
+import heapq
+import json
+import os
+from datetime import datetime
+
+MAX_RUNS = 5
+MAX_CHANGES = 10
+
+
+class CrawlHistory:
+    """
+    Stores the wall time, request count and item count of recent runs for each spider
+    in a JSON file so that later runs can start the longest spiders first and balance
+    spiders across workers. The times that each spider's output changed are also kept
+    to recommend how often it should run.
+
+    :param path: Path to the JSON history file, which is created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.spiders = {}
+        self.changes = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            # Older history files only contain runs
+            if "spiders" in data:
+                self.spiders = data["spiders"]
+                self.changes = data["changes"]
+            else:
+                self.spiders = data
+
+    def save(self):
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"spiders": self.spiders, "changes": self.changes},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def record(self, spider_stats):
+        """Add a run to the history from a mapping of spider names to crawl stats"""
+        for name, stats in spider_stats.items():
+            if stats.get("elapsed_time_seconds") is None:
+                continue
+            self._record_changes(name, stats)
+            runs = self.spiders.setdefault(name, [])
+            runs.append(
+                {
+                    "elapsed": stats["elapsed_time_seconds"],
+                    "requests": stats.get("downloader/request_count", 0),
+                    "items": stats.get("item_scraped_count", 0),
+                    "finish_reason": stats.get("finish_reason"),
+                    "finished": datetime.now().isoformat(timespec="seconds"),
+                }
+            )
+            self.spiders[name] = runs[-MAX_RUNS:]
+
+    def _record_changes(self, name, stats):
+        if "output/added_count" not in stats:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        changes = self.changes.setdefault(name, {"since": now, "times": []})
+        if stats["output/added_count"] or stats.get("output/removed_count"):
+            changes["times"].append(now)
+        if len(changes["times"]) > MAX_CHANGES:
+            changes["since"] = changes["times"].pop(0)
+
+    def interval(self, name, default, min_interval, max_interval, now=None):
+        """Recommended seconds between runs of a spider, which is half the average time
+        between changes to its output. The average starts out assuming one change every
+        two default intervals so that spiders without much history run about as often
+        as the default, and is limited to min_interval and max_interval.
+        """
+        changes = self.changes.get(name)
+        if not changes:
+            return default
+        observed = (now or datetime.now()) - datetime.fromisoformat(changes["since"])
+        interval = (observed.total_seconds() + 2 * default) / (
+            2 * (len(changes["times"]) + 1)
+        )
+        return min(max(interval, min_interval), max_interval)
+
+    def estimate(self, name):
+        """Estimated wall time for a spider. Spiders without any history are assumed
+        to be as slow as the slowest known spider so that they aren't started last.
+        """
+        if self.spiders.get(name):
+            return self._average_elapsed(self.spiders[name])
+        return max(
+            [self._average_elapsed(runs) for runs in self.spiders.values() if runs],
+            default=0,
+        )
+
+    def order(self, spider_names):
+        """Sort spiders by estimated wall time with the longest first"""
+        return sorted(spider_names, key=lambda name: -self.estimate(name))
+
+    def shard(self, spider_names, workers, concurrency=0):
+        """Split spiders across workers, adding each spider (longest first) to the
+        worker with the lowest predicted makespan so far
+        """
+        shards = [[] for _ in range(workers)]
+        for name in self.order(spider_names):
+            shard = min(shards, key=lambda s: self.makespan(s, concurrency))
+            shard.append(name)
+        return [shard for shard in shards if shard]
+
+    def makespan(self, spider_names, concurrency=0):
+        """Predicted wall time for running spiders in order with at most `concurrency`
+        running at once (0 for no limit)
+        """
+        slots = [0] * (concurrency or len(spider_names) or 1)
+        for name in spider_names:
+            heapq.heappush(slots, heapq.heappop(slots) + self.estimate(name))
+        return max(slots)
+
+    def _average_elapsed(self, runs):
+        return sum(run["elapsed"] for run in runs) / len(runs)
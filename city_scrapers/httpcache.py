@@ -0,0 +1,88 @@
+import logging
+import os
+import shutil
+
+from scrapy.extensions.httpcache import FilesystemCacheStorage, RFC2616Policy
+
+logger = logging.getLogger(__name__)
+
+
+class ConditionalCachePolicy(RFC2616Policy):
+    """
+    Cache policy that stores GET responses with an ETag or Last-Modified header and
+    revalidates them with a conditional request every time, regardless of any expiry
+    headers. Agency sites rarely send accurate expiry headers, so a cached response is
+    only used when the server responds with 304 Not Modified (or a server error).
+    """
+
+    def should_cache_request(self, request):
+        return request.method == "GET" and super().should_cache_request(request)
+
+    def should_cache_response(self, response, request):
+        cc = self._parse_cachecontrol(response)
+        return (
+            b"no-store" not in cc
+            and response.status in (200, 203)
+            and (b"ETag" in response.headers or b"Last-Modified" in response.headers)
+        )
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        self._set_conditional_validators(request, cachedresponse)
+        return False
+
+
+class LRUFilesystemCacheStorage(FilesystemCacheStorage):
+    """
+    Filesystem cache storage that removes the least recently used responses for a
+    spider once its cache is larger than CITY_SCRAPERS_HTTPCACHE_MAX_MB. The limit is
+    checked when the spider closes, so the cache can grow past it during a crawl.
+
+    Paths in the cache only depend on spider names and request fingerprints, so the
+    HTTPCACHE_DIR directory can be saved and restored between CI runs.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.max_size = settings.getfloat("CITY_SCRAPERS_HTTPCACHE_MAX_MB") * 1024**2
+
+    def close_spider(self, spider):
+        super().close_spider(spider)
+        spider_dir = os.path.join(self.cachedir, spider.name)
+        if self.max_size and os.path.isdir(spider_dir):
+            removed = self.evict(spider_dir)
+            if removed:
+                logger.info("Removed %d responses from the HTTP cache", removed)
+
+    def retrieve_response(self, spider, request):
+        response = super().retrieve_response(spider, request)
+        if response is not None:
+            os.utime(self._get_request_path(spider, request))
+        return response
+
+    def store_response(self, spider, request, response):
+        super().store_response(spider, request, response)
+        os.utime(self._get_request_path(spider, request))
+
+    def evict(self, spider_dir):
+        """Remove the least recently used responses in a spider's cache directory until
+        it fits in the size limit, returning the number removed
+        """
+        entries = []
+        for prefix in os.listdir(spider_dir):
+            prefix_dir = os.path.join(spider_dir, prefix)
+            for key in os.listdir(prefix_dir):
+                path = os.path.join(prefix_dir, key)
+                size = sum(
+                    os.path.getsize(os.path.join(path, filename))
+                    for filename in os.listdir(path)
+                )
+                entries.append((os.path.getmtime(path), size, path))
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(path)
+            total_size -= size
+            removed += 1
+        return removed
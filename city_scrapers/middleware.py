@@ -1,8 +1,80 @@
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import time
+from copy import deepcopy
+from datetime import datetime
+from tempfile import TemporaryFile
+
+from city_scrapers_core.constants import CANCELLED
 from city_scrapers_core.items import Meeting
+from city_scrapers_core.spiders import CityScrapersSpider
+from scrapy import signals
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.downloadermiddlewares.robotstxt import RobotsTxtMiddleware
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest, NotConfigured
+from scrapy.http import Request
+from scrapy.spidermiddlewares.httperror import HttpError, HttpErrorMiddleware
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.job import job_dir
+from scrapy.utils.misc import load_object
+from scrapy.utils.project import data_path
+from scrapy.utils.request import fingerprint, request_from_dict
 from scrapy_wayback_middleware import WaybackMiddleware
+from scrapy_wayback_middleware.middleware import SLOT_KEY as WAYBACK_SLOT_KEY
+from twisted.internet.defer import Deferred
+from twisted.internet.task import deferLater
+
+from .ratelimit import DomainRateLimiter
+from .utils import match_domain
 
 
 class CityScrapersWaybackMiddleware(WaybackMiddleware):
+    """
+    Submits source pages and meeting links to the Wayback Machine, skipping URLs that
+    have already been submitted in the same crawl. With WAYBACK_BATCH enabled,
+    submissions are held until the spider has finished its own requests and are then
+    scheduled together, so they don't compete with the agency's site for download
+    slots.
+    """
+
+    def __init__(self, crawler, is_post=False):
+        super().__init__(crawler, is_post=is_post)
+        self.batch = crawler.settings.getbool("WAYBACK_BATCH")
+        self.submitted = set()
+        self.pending = []
+        if self.batch:
+            crawler.signals.connect(self.spider_idle, signal=signals.spider_idle)
+
+    def process_spider_output(self, response, result, spider):
+        for value in super().process_spider_output(response, result, spider):
+            if not (
+                isinstance(value, Request)
+                and value.meta.get("download_slot") == WAYBACK_SLOT_KEY
+            ):
+                yield value
+                continue
+            key = (value.url, value.body)
+            if key in self.submitted:
+                self.crawler.stats.inc_value("wayback/duplicate_count")
+                continue
+            self.submitted.add(key)
+            if self.batch:
+                self.pending.append(value)
+            else:
+                yield value
+
+    def spider_idle(self, spider):
+        if not self.pending:
+            return
+        spider.logger.info("Submitting %d URLs to Wayback", len(self.pending))
+        for request in self.pending:
+            self.crawler.engine.crawl(request)
+        self.pending = []
+        raise DontCloseSpider
+
     def get_item_urls(self, item):
         MAX_LINKS = 3
         if isinstance(item, Meeting):
@@ -16,3 +88,808 @@ class CityScrapersWaybackMiddleware(WaybackMiddleware):
         if isinstance(item, dict):
             return [doc.get("url") for doc in item.get("documents", [])][:MAX_LINKS]
         return []
+
+
+class CityScrapersProxyMiddleware:
+    """
+    Sets a proxy on requests only for the spiders and domains that need one so that
+    they can run alongside other spiders without routing all traffic through it.
+
+    Domains in the CITY_SCRAPERS_PROXY_DOMAINS mapping (including their subdomains)
+    use the mapped proxy, and spiders can set CITY_SCRAPERS_PROXY in custom_settings
+    to proxy all of their requests. Empty proxy values are ignored.
+    """
+
+    def __init__(self, proxy=None, domain_proxies=None):
+        self.proxy = proxy
+        self.domain_proxies = {
+            domain: domain_proxy
+            for domain, domain_proxy in (domain_proxies or {}).items()
+            if domain_proxy
+        }
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            proxy=crawler.settings.get("CITY_SCRAPERS_PROXY"),
+            domain_proxies=crawler.settings.getdict("CITY_SCRAPERS_PROXY_DOMAINS"),
+        )
+
+    def process_request(self, request, spider):
+        if "proxy" in request.meta:
+            return
+        proxy = self.get_proxy(request)
+        if proxy:
+            request.meta["proxy"] = proxy
+
+    def get_proxy(self, request):
+        domain = match_domain(urlparse_cached(request).hostname, self.domain_proxies)
+        if domain:
+            return self.domain_proxies[domain]
+        return self.proxy
+
+
+class CityScrapersRobotsTxtMiddleware(RobotsTxtMiddleware):
+    """
+    RobotsTxtMiddleware that shares parsed robots.txt files across all crawlers in a
+    process, so spiders hitting the same host in ``scrapy crawlall`` and repeated runs
+    in ``scrapy daemon`` only fetch each robots.txt once.
+
+    If CITY_SCRAPERS_ROBOTSTXT_DIR is set, robots.txt files are also saved there so
+    separate spider processes and later runs can reuse them. Files are fetched again
+    once they're older than CITY_SCRAPERS_ROBOTSTXT_TTL seconds.
+    """
+
+    parsers = {}
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.ttl = crawler.settings.getfloat("CITY_SCRAPERS_ROBOTSTXT_TTL")
+        self.cache_dir = None
+        cache_dir = crawler.settings.get("CITY_SCRAPERS_ROBOTSTXT_DIR")
+        if cache_dir:
+            self.cache_dir = data_path(cache_dir, createdir=True)
+
+    def robot_parser(self, request, spider):
+        netloc = urlparse_cached(request).netloc
+        if netloc not in self._parsers:
+            parser = self.get_cached_parser(netloc)
+            if parser is not None:
+                self._parsers[netloc] = parser
+                self.crawler.stats.inc_value("robotstxt/cache_hit_count")
+        return super().robot_parser(request, spider)
+
+    def get_cached_parser(self, netloc):
+        """Get a parser for robots.txt fetched within the TTL, either in this process
+        or saved to the cache directory
+        """
+        if netloc in self.parsers:
+            parser, fetched = self.parsers[netloc]
+            if not self.is_expired(fetched):
+                return parser
+        path = self.get_cache_path(netloc)
+        if path is None or not os.path.exists(path):
+            return
+        fetched = os.path.getmtime(path)
+        if self.is_expired(fetched):
+            return
+        with open(path, "rb") as f:
+            parser = self._parserimpl.from_crawler(self.crawler, f.read())
+        self.parsers[netloc] = (parser, fetched)
+        return parser
+
+    def is_expired(self, fetched):
+        return bool(self.ttl) and time.time() - fetched > self.ttl
+
+    def get_cache_path(self, netloc):
+        if self.cache_dir:
+            return os.path.join(self.cache_dir, netloc.replace(":", "_") + ".txt")
+
+    def _parse_robots(self, response, netloc, spider):
+        super()._parse_robots(response, netloc, spider)
+        self.parsers[netloc] = (self._parsers[netloc], time.time())
+        path = self.get_cache_path(netloc)
+        # Server errors are parsed like any other response, but aren't saved so the
+        # file is requested again in the next run
+        if path is not None and response.status < 500:
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp_path, "wb") as f:
+                f.write(response.body)
+            os.replace(tmp_path, path)
+
+
+class CityScrapersHttpCacheMiddleware(HttpCacheMiddleware):
+    """
+    HttpCacheMiddleware that counts the bytes of cached bodies served in place of a
+    304 Not Modified response in the httpcache/bytes_saved stat.
+    """
+
+    def process_response(self, request, response, spider):
+        result = super().process_response(request, response, spider)
+        if response.status == 304 and result is not response:
+            self.stats.inc_value(
+                "httpcache/bytes_saved", len(result.body), spider=spider
+            )
+        return result
+
+
+class CityScrapersSharedResponseMiddleware:
+    """
+    Shares responses between all crawlers in a process, so spiders requesting the same
+    page in ``scrapy crawlall`` only download it once. Requests are matched by their
+    fingerprint and Cookie and Authorization headers. A request for a page that's
+    already being downloaded waits for that response instead of sending another.
+
+    Only GET requests for CITY_SCRAPERS_SHARED_RESPONSE_DOMAINS and their subdomains are
+    shared, so pages only one spider requests aren't kept. Requests with `dont_filter`
+    or `dont_cache`, like pages a spider requests again on purpose, are always
+    downloaded. Responses are kept for CITY_SCRAPERS_SHARED_RESPONSE_TTL seconds so
+    repeated runs in ``scrapy daemon`` download pages again. Bodies larger than
+    CITY_SCRAPERS_SHARED_RESPONSE_SPILL_SIZE bytes, like PDF agenda packets, are kept
+    in temporary files rather than in memory.
+    """
+
+    responses = {}
+    in_flight = {}
+
+    def __init__(self, crawler, ttl, domains, spill_size=0):
+        self.crawler = crawler
+        self.ttl = ttl
+        self.domains = domains
+        self.spill_size = spill_size
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ttl = crawler.settings.getfloat("CITY_SCRAPERS_SHARED_RESPONSE_TTL")
+        domains = crawler.settings.getlist("CITY_SCRAPERS_SHARED_RESPONSE_DOMAINS")
+        if not ttl or not domains:
+            raise NotConfigured
+        return cls(
+            crawler,
+            ttl,
+            domains,
+            spill_size=crawler.settings.getint(
+                "CITY_SCRAPERS_SHARED_RESPONSE_SPILL_SIZE"
+            ),
+        )
+
+    def process_request(self, request, spider):
+        if (
+            request.method != "GET"
+            or request.dont_filter
+            or request.meta.get("dont_cache")
+            or not match_domain(urlparse_cached(request).hostname, self.domains)
+        ):
+            return
+        key = fingerprint(request, include_headers=["Cookie", "Authorization"])
+        self.remove_expired()
+        if key in self.responses:
+            self.crawler.stats.inc_value("sharedresponse/hit_count")
+            return self.get_response(key, request)
+        if key in self.in_flight:
+            self.crawler.stats.inc_value("sharedresponse/wait_count")
+            waiting = Deferred()
+            self.in_flight[key].append((request, waiting))
+            return waiting
+        self.in_flight[key] = []
+        request.meta["shared_response_key"] = key
+
+    def process_response(self, request, response, spider):
+        key = request.meta.pop("shared_response_key", None)
+        if key is None or "shared" in response.flags:
+            return response
+        # Errors aren't kept so that retries are downloaded again
+        if response.status < 400:
+            self.store_response(key, response)
+        for waiting_request, waiting in self.in_flight.pop(key, []):
+            waiting.callback(
+                response.replace(request=waiting_request, flags=["shared"])
+            )
+        return response
+
+    def process_exception(self, request, exception, spider):
+        key = request.meta.pop("shared_response_key", None)
+        # Requests waiting on a failed download are sent separately
+        for _, waiting in self.in_flight.pop(key, []):
+            waiting.callback(None)
+
+    def store_response(self, key, response):
+        # The engine sets the request of the returned response, so a copy is kept
+        # without one to avoid calling the first spider's callback on later hits
+        response = response.replace(request=None)
+        body_file = None
+        if self.spill_size and len(response.body) > self.spill_size:
+            body_file = TemporaryFile()
+            body_file.write(response.body)
+            response = response.replace(body=b"")
+            self.crawler.stats.inc_value("sharedresponse/spilled_count")
+        self.responses[key] = (time.monotonic(), response, body_file)
+
+    def get_response(self, key, request):
+        _, response, body_file = self.responses[key]
+        if body_file is None:
+            return response.replace(request=request, flags=["shared"])
+        body_file.seek(0)
+        return response.replace(
+            body=body_file.read(), request=request, flags=["shared"]
+        )
+
+    def remove_expired(self):
+        expired = time.monotonic() - self.ttl
+        for key, (stored, _, body_file) in list(self.responses.items()):
+            if stored < expired:
+                if body_file is not None:
+                    body_file.close()
+                del self.responses[key]
+
+
+class CityScrapersDomainSlotMiddleware:
+    """
+    Applies the per-domain download settings in CITY_SCRAPERS_DOMAIN_SLOTS to requests
+    for each domain and its subdomains. Requests use the domain as their download slot
+    so DOWNLOAD_SLOTS sets its concurrency and delay, and the slot's delay is kept from
+    going below the configured one when AutoThrottle adjusts it. A "timeout" sets the
+    download_timeout of requests that don't already have one.
+
+    The number of responses, bytes and download time for every slot, including ones
+    without settings, are counted in "slot/<key>/..." stats for the throughput report
+    logged by ``scrapy crawlall``.
+    """
+
+    def __init__(self, crawler, domain_slots):
+        self.crawler = crawler
+        # Check subdomains before the domains they're part of
+        self.domain_slots = dict(
+            sorted(domain_slots.items(), key=lambda item: -len(item[0]))
+        )
+        self.slot_start_times = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler, crawler.settings.getdict("CITY_SCRAPERS_DOMAIN_SLOTS"))
+
+    def process_request(self, request, spider):
+        domain = match_domain(urlparse_cached(request).hostname, self.domain_slots)
+        if domain is None:
+            return
+        request.meta.setdefault("download_slot", domain)
+        timeout = self.domain_slots[domain].get("timeout")
+        if timeout:
+            request.meta.setdefault("download_timeout", timeout)
+
+    def process_response(self, request, response, spider):
+        key = request.meta.get("download_slot")
+        if key is None or "shared" in response.flags:
+            return response
+        min_delay = self.domain_slots.get(key, {}).get("delay")
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if min_delay and slot is not None and slot.delay < min_delay:
+            slot.delay = min_delay
+
+        now = time.monotonic()
+        start_time = self.slot_start_times.setdefault(
+            key, now - request.meta.get("download_latency", 0)
+        )
+        stats = self.crawler.stats
+        stats.inc_value("slot/{}/response_count".format(key))
+        stats.inc_value("slot/{}/response_bytes".format(key), len(response.body))
+        stats.inc_value(
+            "slot/{}/latency_seconds".format(key),
+            request.meta.get("download_latency", 0),
+        )
+        stats.set_value("slot/{}/active_seconds".format(key), now - start_time)
+        return response
+
+
+class CityScrapersRateLimitMiddleware:
+    """
+    Limits requests per second to the domains in CITY_SCRAPERS_RATE_LIMITS (including
+    their subdomains) across every crawl process on a host. AutoThrottle only sees the
+    requests of its own process, so this keeps parallel runs from multiplying the load
+    on shared municipal servers. Requests are delayed until their reserved token is
+    available.
+    """
+
+    def __init__(self, crawler, limiter):
+        self.crawler = crawler
+        self.limiter = limiter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        rates = crawler.settings.getdict("CITY_SCRAPERS_RATE_LIMITS")
+        if not rates:
+            raise NotConfigured
+        limiter = DomainRateLimiter(
+            data_path(crawler.settings.get("CITY_SCRAPERS_RATE_LIMIT_DIR")),
+            {domain: float(rate) for domain, rate in rates.items()},
+            burst=crawler.settings.getint("CITY_SCRAPERS_RATE_LIMIT_BURST"),
+        )
+        return cls(crawler, limiter)
+
+    def process_request(self, request, spider):
+        domain = match_domain(urlparse_cached(request).hostname, self.limiter.rates)
+        if not domain:
+            return
+        delay = self.limiter.reserve(domain)
+        if delay > 0:
+            from twisted.internet import reactor
+
+            self.crawler.stats.inc_value("ratelimit/delayed_count")
+            self.crawler.stats.inc_value("ratelimit/delay_seconds", delay)
+            return deferLater(reactor, delay, lambda: None)
+
+
+class CityScrapersCircuitBreakerMiddleware:
+    """
+    Stops requesting hosts that appear to be down. After
+    CITY_SCRAPERS_CIRCUIT_BREAKER_THRESHOLD consecutive connection errors, timeouts or
+    5xx responses from a host, the circuit for that host opens and its pending and new
+    requests are dropped instead of waiting on retries and AutoThrottle backoff.
+    Requests already waiting in a download slot are dropped when the circuit opens,
+    and failed requests to an open host aren't retried.
+
+    Enable it after HttpCacheMiddleware so it sees the responses from the host rather
+    than cached copies. Cached and shared responses don't count as successes.
+
+    Circuits are shared by all crawlers in a process, and close again after
+    CITY_SCRAPERS_CIRCUIT_BREAKER_RESET seconds so later runs in ``scrapy daemon``
+    try the host again.
+    """
+
+    failures = {}
+    opened = {}
+
+    def __init__(self, crawler, threshold, reset):
+        self.crawler = crawler
+        self.threshold = threshold
+        self.reset = reset
+        self.dropped_hosts = set()
+        self.exceptions = tuple(
+            load_object(exc) if isinstance(exc, str) else exc
+            for exc in crawler.settings.getlist("RETRY_EXCEPTIONS")
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        threshold = crawler.settings.getint("CITY_SCRAPERS_CIRCUIT_BREAKER_THRESHOLD")
+        if not threshold:
+            raise NotConfigured
+        return cls(
+            crawler,
+            threshold,
+            crawler.settings.getfloat("CITY_SCRAPERS_CIRCUIT_BREAKER_RESET"),
+        )
+
+    def process_request(self, request, spider):
+        host = urlparse_cached(request).hostname
+        if host not in self.opened:
+            return
+        if self.reset and time.time() - self.opened[host] > self.reset:
+            del self.opened[host]
+            self.failures.pop(host, None)
+            return
+        if host not in self.dropped_hosts:
+            self.dropped_hosts.add(host)
+            self.crawler.stats.inc_value("circuit_open", spider=spider)
+            self.crawler.stats.set_value(
+                "circuit_breaker/{}/opened".format(host),
+                self.opened[host],
+                spider=spider,
+            )
+        self.crawler.stats.inc_value("circuit_breaker/dropped_count", spider=spider)
+        raise IgnoreRequest("Circuit open for {}".format(host))
+
+    def process_response(self, request, response, spider):
+        if "cached" in response.flags or "shared" in response.flags:
+            return response
+        if response.status >= 500:
+            self.record_failure(request, spider)
+        else:
+            self.failures.pop(urlparse_cached(request).hostname, None)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, self.exceptions):
+            self.record_failure(request, spider)
+
+    def record_failure(self, request, spider):
+        host = urlparse_cached(request).hostname
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.threshold and host not in self.opened:
+            self.opened[host] = time.time()
+            spider.logger.warning(
+                "Circuit opened for %s after %d consecutive failures",
+                host,
+                self.failures[host],
+            )
+            self.drop_queued(host, spider)
+        if host in self.opened:
+            # Skips RetryMiddleware, since retries would only be dropped
+            self.crawler.stats.inc_value("circuit_breaker/dropped_count", spider=spider)
+            raise IgnoreRequest("Circuit open for {}".format(host))
+
+    def drop_queued(self, host, spider):
+        """Drop requests for a host waiting in download slots, which have already
+        passed process_request and would otherwise wait on their download timeouts
+        """
+        for slot in self.crawler.engine.downloader.slots.values():
+            for queued in list(slot.queue):
+                request, deferred = queued
+                if urlparse_cached(request).hostname != host:
+                    continue
+                slot.queue.remove(queued)
+                self.crawler.stats.inc_value(
+                    "circuit_breaker/dropped_count", spider=spider
+                )
+                deferred.errback(IgnoreRequest("Circuit open for {}".format(host)))
+
+
+class CityScrapersJobStateMiddleware:
+    """
+    Spider middleware that makes crawls with a JOBDIR resumable for spiders that keep
+    values from earlier callbacks in attributes. Scrapy persists the scheduler queue
+    and dupefilter in JOBDIR, and this saves the attributes listed in a spider's
+    `state_attrs` along with them when the spider closes.
+
+    When a crawl is resumed the attributes are restored and start requests that were
+    already scheduled are skipped so that only the outstanding requests are run. Only
+    crawls stopped by a shutdown are resumed. Crawls closed for any other reason, like
+    finishing or CLOSESPIDER_TIMEOUT, clear their state and queued requests so the
+    next run starts over instead of only yielding the items that were outstanding.
+    """
+
+    STATE_FILENAME = "spider_attrs.pickle"
+
+    def __init__(self, jobdir):
+        self.jobdir = jobdir
+        self.start_requests_count = 0
+        self.skip_start_requests = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        jobdir = job_dir(crawler.settings)
+        if not jobdir:
+            raise NotConfigured
+        middleware = cls(jobdir)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    @property
+    def state_path(self):
+        return os.path.join(self.jobdir, self.STATE_FILENAME)
+
+    def spider_opened(self, spider):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, "rb") as f:
+            state = pickle.load(f)
+        for attr, value in state["attrs"].items():
+            setattr(spider, attr, value)
+        self.skip_start_requests = state["start_requests"]
+        spider.logger.info("Resuming crawl from %s", self.jobdir)
+
+    def spider_closed(self, spider, reason):
+        if reason != "shutdown":
+            for filename in [self.STATE_FILENAME, "requests.seen"]:
+                path = os.path.join(self.jobdir, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+            # The scheduler has already saved the requests left in its queue
+            shutil.rmtree(os.path.join(self.jobdir, "requests.queue"), True)
+            return
+        with open(self.state_path, "wb") as f:
+            pickle.dump(
+                {
+                    "attrs": {
+                        attr: getattr(spider, attr)
+                        for attr in getattr(spider, "state_attrs", [])
+                        if hasattr(spider, attr)
+                    },
+                    "start_requests": self.start_requests_count,
+                },
+                f,
+            )
+
+    def process_start_requests(self, start_requests, spider):
+        # Start requests are consumed lazily after spider_opened restores the state
+        for request in start_requests:
+            self.start_requests_count += 1
+            if self.start_requests_count > self.skip_start_requests:
+                yield request
+
+
+def refresh_item(item, spider):
+    """
+    Copy an item saved from an earlier run with its status updated for the current
+    time. Cancellations can come from text that isn't saved with the item, so
+    cancelled meetings stay cancelled.
+    """
+    item = deepcopy(item)
+    if isinstance(item, Meeting) and item.get("status") != CANCELLED:
+        item["status"] = spider._get_status(item)
+    return item
+
+
+class SourceUnchanged(IgnoreRequest):
+    """Raised for responses showing that a spider's source hasn't changed"""
+
+
+class CityScrapersChangeDetectionMiddleware:
+    """
+    Spider middleware that skips most of a crawl when the pages a spider starts from
+    haven't changed since its last run. Only applies to spiders that set
+    `change_detection = True`, since it assumes everything a spider yields depends on
+    its start URLs.
+
+    Start requests are sent with If-None-Match and If-Modified-Since headers from the
+    previous response. When a server responds with 304 Not Modified, or with the same
+    body as before, the items yielded from that start URL in the previous run are
+    yielded again with their status updated instead of calling the spider. State is
+    saved in CITY_SCRAPERS_CHANGE_DIR after crawls that finish without errors.
+
+    Requests that follow from a start URL are tracked until their responses reach the
+    spider. If any of them fail or are never downloaded, the items saved for that
+    start URL would be incomplete, so the entry from the previous run is kept instead.
+    """
+
+    def __init__(self, crawler, state_dir):
+        self.crawler = crawler
+        self.state_dir = state_dir
+        self.state = {}
+        self.new_state = {}
+        self.pending = {}
+        self.failed = set()
+        # Runs before HttpErrorMiddleware, which drops error responses before they
+        # reach process_spider_exception, so errors are checked with its settings
+        self.http_error = HttpErrorMiddleware(crawler.settings)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        state_dir = crawler.settings.get("CITY_SCRAPERS_CHANGE_DIR")
+        if not state_dir:
+            raise NotConfigured
+        middleware = cls(crawler, data_path(state_dir, createdir=True))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(
+            middleware.request_dropped, signal=signals.request_dropped
+        )
+        return middleware
+
+    def get_state_path(self, spider):
+        return os.path.join(self.state_dir, "{}.pickle".format(spider.name))
+
+    def spider_opened(self, spider):
+        state_path = self.get_state_path(spider)
+        if getattr(spider, "change_detection", False) and os.path.exists(state_path):
+            with open(state_path, "rb") as f:
+                self.state = pickle.load(f)
+
+    def spider_closed(self, spider, reason):
+        if not getattr(spider, "change_detection", False):
+            return
+        if reason != "finished" or self.crawler.stats.get_value("log_count/ERROR"):
+            return
+        for url in set(self.new_state) | self.failed:
+            if self.pending.get(url) or url in self.failed:
+                self.crawler.stats.inc_value("change_detection/incomplete_count")
+                if url in self.state:
+                    self.new_state[url] = self.state[url]
+                else:
+                    self.new_state.pop(url, None)
+        with open(self.get_state_path(spider), "wb") as f:
+            pickle.dump(self.new_state, f)
+
+    def request_dropped(self, request, spider):
+        # Requests filtered as duplicates aren't needed for the start URL's items
+        self.finish_request(request.meta)
+
+    def finish_request(self, meta):
+        url = meta.get("change_detection_url")
+        if url is not None and not meta.get("change_detection_start"):
+            self.pending[url] = self.pending.get(url, 0) - 1
+
+    def process_start_requests(self, start_requests, spider):
+        for request in start_requests:
+            if getattr(spider, "change_detection", False):
+                request.meta.setdefault("change_detection_url", request.url)
+                request.meta["change_detection_start"] = True
+                self.add_validators(request, self.state.get(request.url))
+            yield request
+
+    def process_spider_input(self, response, spider):
+        url = response.meta.get("change_detection_url")
+        if not response.meta.get("change_detection_start"):
+            self.finish_request(response.meta)
+            if url is not None and self.is_http_error(response, spider):
+                self.failed.add(url)
+            return
+        prev = self.state.get(url)
+        body_hash = hashlib.sha256(response.body).hexdigest()
+        if prev and (response.status == 304 or body_hash == prev["hash"]):
+            raise SourceUnchanged(url)
+        if self.is_http_error(response, spider):
+            self.failed.add(url)
+        elif response.status != 304:
+            self.new_state[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": body_hash,
+                "items": [],
+            }
+
+    def process_spider_output(self, response, result, spider):
+        url = response.meta.get("change_detection_url")
+        for value in result:
+            if url is not None:
+                if isinstance(value, Request):
+                    value.meta.setdefault("change_detection_url", url)
+                    value.meta.pop("change_detection_start", None)
+                    request_url = value.meta["change_detection_url"]
+                    self.pending[request_url] = self.pending.get(request_url, 0) + 1
+                elif url in self.new_state:
+                    self.new_state[url]["items"].append(deepcopy(value))
+            yield value
+
+    def process_spider_exception(self, response, exception, spider):
+        if not isinstance(exception, SourceUnchanged):
+            url = response.meta.get("change_detection_url")
+            if url is not None:
+                self.failed.add(url)
+            return
+        url = str(exception)
+        self.new_state[url] = self.state[url]
+        self.crawler.stats.inc_value("change_detection/unchanged_count")
+        for item in self.state[url]["items"]:
+            self.crawler.stats.inc_value("change_detection/item_count")
+            yield refresh_item(item, spider)
+
+    def is_http_error(self, response, spider):
+        try:
+            self.http_error.process_spider_input(response, spider)
+        except HttpError:
+            return True
+        return False
+
+    def add_validators(self, request, prev):
+        if not prev:
+            return
+        if prev["etag"]:
+            request.headers.setdefault("If-None-Match", prev["etag"])
+        if prev["last_modified"]:
+            request.headers.setdefault("If-Modified-Since", prev["last_modified"])
+
+
+class ResponseUnchanged(IgnoreRequest):
+    """Raised for responses that a spider has already parsed in an earlier run"""
+
+
+class CityScrapersReplayMiddleware:
+    """
+    Spider middleware that saves the items and requests each callback yields, keyed by
+    a hash of the response and the spider's code. When a later crawl gets an identical
+    response for the same request, the saved output is yielded again with updated
+    meeting statuses instead of parsing the response. Saved output is kept in
+    CITY_SCRAPERS_REPLAY_DIR, and the replay/hit_count and replay/miss_count stats
+    track how often it's used.
+
+    Applies to every CityScrapersSpider except spiders listing `state_attrs`, since
+    their callbacks depend on values set by earlier callbacks, and spiders that set
+    `replay_responses = False` because their output depends on the current date. The
+    key includes the current month, so output that only depends on the year or month,
+    like dates parsed without a year, isn't replayed after it changes.
+    """
+
+    def __init__(self, crawler, state_dir):
+        self.crawler = crawler
+        self.state_dir = state_dir
+        self.version = None
+        self.outputs = {}
+        self.new_outputs = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        state_dir = crawler.settings.get("CITY_SCRAPERS_REPLAY_DIR")
+        if not state_dir:
+            raise NotConfigured
+        middleware = cls(crawler, data_path(state_dir, createdir=True))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def is_enabled(self, spider):
+        return (
+            isinstance(spider, CityScrapersSpider)
+            and not getattr(spider, "state_attrs", None)
+            and getattr(spider, "replay_responses", True)
+        )
+
+    def get_state_path(self, spider):
+        return os.path.join(self.state_dir, "{}.pickle".format(spider.name))
+
+    def spider_opened(self, spider):
+        if not self.is_enabled(spider):
+            return
+        self.version = self.get_code_version(spider)
+        state_path = self.get_state_path(spider)
+        if os.path.exists(state_path):
+            with open(state_path, "rb") as f:
+                self.outputs = pickle.load(f)
+
+    def spider_closed(self, spider):
+        if not self.is_enabled(spider):
+            return
+        with open(self.get_state_path(spider), "wb") as f:
+            pickle.dump(self.new_outputs, f)
+
+    def process_spider_input(self, response, spider):
+        # Output of FanOutMixin groups depends on every response in the group
+        if not self.is_enabled(spider) or "fan_out" in response.meta:
+            return
+        key = self.get_key(response)
+        response.meta["replay_key"] = key
+        if key in self.outputs:
+            raise ResponseUnchanged(key)
+        self.crawler.stats.inc_value("replay/miss_count")
+
+    def process_spider_output(self, response, result, spider):
+        key = response.meta.get("replay_key")
+        outputs = []
+        for value in result:
+            if key is not None and outputs is not None:
+                try:
+                    outputs.append(self.serialize(value, spider))
+                except ValueError:
+                    # Requests with callbacks that aren't spider methods can't be saved
+                    outputs = None
+            yield value
+        # Only reached if the callback didn't raise an exception partway through
+        if key is not None and outputs is not None:
+            self.new_outputs[key] = outputs
+
+    def process_spider_exception(self, response, exception, spider):
+        if not isinstance(exception, ResponseUnchanged):
+            return
+        key = str(exception)
+        self.new_outputs[key] = self.outputs[key]
+        self.crawler.stats.inc_value("replay/hit_count")
+        for output_type, value in self.outputs[key]:
+            if output_type == "request":
+                yield request_from_dict(value, spider=spider)
+            else:
+                yield refresh_item(value, spider)
+
+    def serialize(self, value, spider):
+        if isinstance(value, Request):
+            return ("request", value.to_dict(spider=spider))
+        return ("item", deepcopy(value))
+
+    def get_key(self, response):
+        request = response.request
+        key_hash = hashlib.sha256(self.version.encode())
+        key_hash.update(self.crawler.request_fingerprinter.fingerprint(request))
+        key_hash.update(
+            repr(
+                (
+                    getattr(request.callback, "__name__", None),
+                    sorted(request.cb_kwargs.items()),
+                    response.url,
+                    response.status,
+                    datetime.now().strftime("%Y-%m"),
+                )
+            ).encode()
+        )
+        key_hash.update(response.body)
+        return key_hash.hexdigest()
+
+    def get_code_version(self, spider):
+        """Hash the source files of a spider class and the project classes it inherits
+        from, so output saved before any changes to their code isn't used
+        """
+        code_hash = hashlib.sha256()
+        for cls in type(spider).__mro__:
+            if cls.__module__.split(".")[0] in ["city_scrapers", "city_scrapers_core"]:
+                with open(inspect.getsourcefile(cls), "rb") as f:
+                    code_hash.update(f.read())
+        return code_hash.hexdigest()
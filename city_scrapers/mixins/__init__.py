@@ -0,0 +1 @@
+from .fan_out import FanOutMixin  # noqa
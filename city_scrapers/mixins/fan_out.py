@@ -0,0 +1,84 @@
+from uuid import uuid4
+
+from scrapy.utils.request import request_from_dict
+
+
+class FanOutMixin:
+    """
+    Mixin for spiders that need several pages that don't depend on each other before
+    they can parse meetings, like a documents page and a calendar. The pages are
+    requested in parallel and one callback is called once all of them are done,
+    instead of chaining the requests so each page waits on the one before it.
+
+    Groups waiting on responses are kept in `fan_out_groups`. Spiders that list it in
+    `state_attrs` can be resumed from a JOBDIR: responses received before the crawl
+    stopped aren't saved, so those pages are requested again once the first of the
+    group's queued requests comes back.
+    """
+
+    def fan_out(self, requests, callback, cb_kwargs=None):
+        """Request pages in parallel and call `callback` when all are downloaded
+
+        :param requests: Dict of names to Requests, which are sent with `dont_filter`
+        :param callback: Spider method called with a dict of the same names to
+            responses, with None for requests that failed and were logged as
+            errors, and `cb_kwargs` as keyword arguments. Values in `cb_kwargs` can
+            be used in place of spider attributes to share state with later
+            callbacks
+        :param cb_kwargs: Optional dict of keyword arguments for `callback`
+        :return: Generator of Requests to yield from a callback or start_requests
+        """
+        group_id = uuid4().hex
+        fan_out_requests = {
+            key: request.replace(
+                callback=self._fan_in,
+                errback=self._fan_in_error,
+                meta={**request.meta, "fan_out": (group_id, key)},
+                dont_filter=True,
+            )
+            for key, request in requests.items()
+        }
+        self.__dict__.setdefault("fan_out_groups", {})[group_id] = {
+            "callback": callback.__name__,
+            "cb_kwargs": cb_kwargs or {},
+            "requests": {
+                key: request.to_dict(spider=self)
+                for key, request in fan_out_requests.items()
+            },
+            "pending": set(requests),
+        }
+        yield from fan_out_requests.values()
+
+    def _fan_in(self, response):
+        yield from self._join(response.meta["fan_out"], response)
+
+    def _fan_in_error(self, failure):
+        self.logger.error(
+            "Fan-out request failed: %s (%r)", failure.request, failure.value
+        )
+        yield from self._join(failure.request.meta["fan_out"], None)
+
+    def _join(self, fan_out, response):
+        group_id, key = fan_out
+        group = self.__dict__.get("fan_out_groups", {}).get(group_id)
+        if group is None or key not in group["pending"]:
+            # Only possible for responses from a JOBDIR crawl resumed without
+            # fan_out_groups in state_attrs, where the rest of the group is lost
+            self.logger.warning("Ignoring response for unknown fan-out group %s", key)
+            return
+        responses = self.__dict__.setdefault("fan_out_responses", {}).setdefault(
+            group_id, {}
+        )
+        # Pages received before a resumed crawl stopped are requested again
+        for lost_key in set(group["requests"]) - group["pending"] - set(responses):
+            group["pending"].add(lost_key)
+            yield request_from_dict(group["requests"][lost_key], spider=self)
+        responses[key] = response
+        group["pending"].discard(key)
+        if group["pending"]:
+            return
+        del self.fan_out_groups[group_id]
+        del self.fan_out_responses[group_id]
+        result = getattr(self, group["callback"])(responses, **group["cb_kwargs"])
+        if result is not None:
+            yield from result
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from importlib.metadata import version
+from io import BytesIO, StringIO
+
+from scrapy.utils.project import data_path
+
+from .utils import lazy_import
+
+high_level = lazy_import("pdfminer.high_level")
+layout = lazy_import("pdfminer.layout")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAPARAMS = {"line_margin": 0.1}
+PDFMINER_VERSION = version("pdfminer.six")
+
+
+def extract_text(pdf_bytes, spider=None, **laparams):
+    """Extract the text of a PDF with pdfminer. If the spider's crawler has
+    CITY_SCRAPERS_PDF_CACHE_DIR set, text extracted from identical PDFs in earlier
+    runs is reused instead of analyzing the layout again.
+
+    :param pdf_bytes: Contents of the PDF
+    :param spider: Spider to read cache settings from and record stats for
+    :param laparams: pdfminer layout parameters, using line_margin=0.1 by default
+    :return: Text of the PDF
+    """
+    laparams = {**DEFAULT_LAPARAMS, **laparams}
+    crawler = getattr(spider, "crawler", None)
+    if crawler is None or not crawler.settings.get("CITY_SCRAPERS_PDF_CACHE_DIR"):
+        return _extract_text(pdf_bytes, laparams)
+    return PdfTextCache.from_crawler(crawler).get_text(pdf_bytes, laparams)
+
+
+def _extract_text(pdf_bytes, laparams):
+    out_str = StringIO()
+    high_level.extract_text_to_fp(
+        BytesIO(pdf_bytes), out_str, laparams=layout.LAParams(**laparams)
+    )
+    return out_str.getvalue()
+
+
+class PdfTextCache:
+    """
+    Text extracted from PDFs, stored in files named by the SHA-256 hash of each PDF
+    along with the layout parameters and pdfminer version. Once the cache is larger
+    than CITY_SCRAPERS_PDF_CACHE_MAX_MB the least recently used files are removed.
+
+    The pdf/cache_hit_count, pdf/cache_miss_count and pdf/time_saved_seconds stats
+    track how often the cache is used and how long extracting the cached text took.
+    """
+
+    def __init__(self, cache_dir, max_size, stats):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            data_path(
+                crawler.settings.get("CITY_SCRAPERS_PDF_CACHE_DIR"), createdir=True
+            ),
+            crawler.settings.getfloat("CITY_SCRAPERS_PDF_CACHE_MAX_MB") * 1024**2,
+            crawler.stats,
+        )
+
+    def get_text(self, pdf_bytes, laparams):
+        path = os.path.join(self.cache_dir, self.get_key(pdf_bytes, laparams) + ".json")
+        entry = self.load_entry(path)
+        if entry is not None:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted by another process since it was read
+                pass
+            self.stats.inc_value("pdf/cache_hit_count")
+            self.stats.inc_value("pdf/time_saved_seconds", entry["seconds"])
+            return entry["text"]
+
+        self.stats.inc_value("pdf/cache_miss_count")
+        start = time.perf_counter()
+        text = _extract_text(pdf_bytes, laparams)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"text": text, "seconds": time.perf_counter() - start}, f)
+        os.replace(tmp_path, path)
+        if self.max_size:
+            self.evict()
+        return text
+
+    def get_key(self, pdf_bytes, laparams):
+        key = hashlib.sha256(pdf_bytes)
+        key.update(
+            json.dumps(
+                {"laparams": laparams, "pdfminer": PDFMINER_VERSION},
+                sort_keys=True,
+            ).encode()
+        )
+        return key.hexdigest()
+
+    def load_entry(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return
+
+    def evict(self):
+        """Remove the least recently used text until the cache fits in the size limit"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            # Skip files other processes are still writing
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+            except FileNotFoundError:
+                # Removed by another process evicting at the same time
+                continue
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total_size -= size
+        if removed:
+            logger.info("Removed %d files from the PDF text cache", removed)
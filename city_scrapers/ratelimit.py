@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where buckets are only shared within a process
+    fcntl = None
+
+_process_lock = threading.Lock()
+
+
+@contextmanager
+def lock_file(f):
+    """Hold an exclusive lock on an open file, or a lock for this process when file
+    locks aren't supported
+    """
+    if fcntl is None:
+        with _process_lock:
+            yield
+        return
+    fcntl.flock(f, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class DomainRateLimiter:
+    """
+    Token bucket rate limiter for each domain with its state kept in files so that it
+    is shared by every crawl process on a host. Each call to `reserve` takes a token
+    from the domain's bucket and returns how long to wait before the request is sent,
+    so processes don't need to poll for free tokens.
+
+    :param state_dir: Directory holding a locked state file for each domain
+    :param rates: Mapping of domains to the requests per second allowed
+    :param burst: Number of requests that can be sent at once after being idle
+    :param clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, state_dir, rates, burst=1, clock=time.time):
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+        self.rates = rates
+        self.burst = burst
+        self.clock = clock
+
+    def reserve(self, domain):
+        """Take a token for a domain, returning the seconds to wait before using it"""
+        rate = self.rates[domain]
+        path = os.path.join(self.state_dir, domain)
+        with open(path, "a+") as f, lock_file(f):
+            f.seek(0)
+            now = self.clock()
+            tokens, updated = self._read_state(f.read(), now)
+            tokens = min(self.burst, tokens + (now - updated) * rate) - 1
+            f.seek(0)
+            f.truncate()
+            f.write("{} {}".format(tokens, now))
+            f.flush()
+        return max(-tokens / rate, 0)
+
+    def _read_state(self, content, now):
+        try:
+            tokens, updated = content.split()
+            return float(tokens), float(updated)
+        except ValueError:
+            return self.burst, now
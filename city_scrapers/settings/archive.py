@@ -0,0 +1,31 @@
+from .base import *  # noqa
+
+# Only submits source and meeting link URLs to the Wayback Machine, so nothing is
+# written to feeds and items aren't processed after they're yielded
+
+USER_AGENT = "City Scrapers [archive mode]. Learn more and say hello at https://citybureau.org/city-scrapers"  # noqa
+
+ITEM_PIPELINES = {}
+
+SPIDER_MIDDLEWARES = {
+    **SPIDER_MIDDLEWARES,  # noqa
+    "city_scrapers.middleware.CityScrapersWaybackMiddleware": 500,
+}
+
+# Submissions are rate limited, so spiders with many links take longer than in
+# production
+CLOSESPIDER_TIMEOUT = 4 * 60 * 60
+
+EXTENSIONS = {
+    **EXTENSIONS,  # noqa
+    "city_scrapers.extensions.OutputChangesExtension": None,
+}
+
+# Submit each URL once after a spider has finished crawling its agency's site, with a
+# limited number of Wayback requests in flight. The rate limit covers all workers
+WAYBACK_BATCH = True
+DOWNLOAD_SLOTS = {**DOWNLOAD_SLOTS, "_wayback_slot": {"concurrency": 2}}  # noqa
+CITY_SCRAPERS_RATE_LIMITS = {
+    **CITY_SCRAPERS_RATE_LIMITS,  # noqa
+    "web.archive.org": 0.25,
+}
@@ -15,15 +15,31 @@ BOT_NAME = "city_scrapers"
 SPIDER_MODULES = ["city_scrapers.spiders"]
 NEWSPIDER_MODULE = "city_scrapers.spiders"
 
+# Load spiders from the generated manifest so that only the spiders being run are
+# imported. `scrapy genspider` updates it, otherwise regenerate it with
+# `scrapy manifest` after adding a spider
+SPIDER_LOADER_CLASS = "city_scrapers.spiderloader.ManifestSpiderLoader"
+
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 USER_AGENT = "City Scrapers [development mode]. Learn more and say hello at https://www.citybureau.org/city-scrapers/"  # noqa
 
 # Obey robots.txt rules
 ROBOTSTXT_OBEY = True
 
+# Directory under the project data directory where robots.txt files are saved so
+# they're shared between spider processes, and how many seconds they're reused for
+CITY_SCRAPERS_ROBOTSTXT_DIR = "robotstxt"
+CITY_SCRAPERS_ROBOTSTXT_TTL = 24 * 60 * 60
+
 # Disable cookies (enabled by default)
 COOKIES_ENABLED = False
 
+# Cancel downloads larger than this so a huge file can't exhaust memory on small
+# runners. Spiders downloading PDFs or email attachments raise the limit with a
+# download_maxsize attribute
+DOWNLOAD_MAXSIZE = 16 * 1024 * 1024
+DOWNLOAD_WARNSIZE = 4 * 1024 * 1024
+
 # Configure item pipelines
 ITEM_PIPELINES = {
     "city_scrapers_core.pipelines.DefaultValuesPipeline": 100,
@@ -33,19 +49,133 @@ ITEM_PIPELINES = {
 # Enable or disable downloader middlewares
 # See http://scrapy.readthedocs.org/en/latest/topics/downloader-middleware.html
 DOWNLOADER_MIDDLEWARES = {
-    "scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware": 543,
+    "city_scrapers.middleware.CityScrapersDomainSlotMiddleware": 340,
+    "scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware": None,
+    "city_scrapers.middleware.CityScrapersRobotsTxtMiddleware": 543,
+    "city_scrapers.middleware.CityScrapersProxyMiddleware": 740,
+    "city_scrapers.middleware.CityScrapersSharedResponseMiddleware": 840,
+    "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+    "city_scrapers.middleware.CityScrapersHttpCacheMiddleware": 900,
+    "city_scrapers.middleware.CityScrapersCircuitBreakerMiddleware": 920,
+    "city_scrapers.middleware.CityScrapersRateLimitMiddleware": 950,
+}
+
+# Proxy requests only for the domains listed here (or for spiders setting
+# CITY_SCRAPERS_PROXY in custom_settings) rather than exporting HTTP_PROXY for a run
+CITY_SCRAPERS_PROXY_DOMAINS = {
+    "yourmetrobus.org": os.getenv("CITY_SCRAPERS_PROXY"),
+}
+
+# Seconds that responses are shared between spiders crawling the same pages in one
+# process, like akr_city_council and akr_city_council_committees, for these domains
+CITY_SCRAPERS_SHARED_RESPONSE_TTL = 15 * 60
+CITY_SCRAPERS_SHARED_RESPONSE_DOMAINS = ["akronohio.gov"]
+# Shared bodies larger than this many bytes are kept in temporary files
+CITY_SCRAPERS_SHARED_RESPONSE_SPILL_SIZE = 1024 * 1024
+
+# Keep responses with validators in HTTPCACHE_DIR under the project data directory and
+# revalidate them with conditional requests on each run, using the stored body when
+# the server responds with 304 Not Modified. Each spider's cache is limited to
+# CITY_SCRAPERS_HTTPCACHE_MAX_MB with the least recently used responses removed first
+HTTPCACHE_ENABLED = True
+HTTPCACHE_POLICY = "city_scrapers.httpcache.ConditionalCachePolicy"
+HTTPCACHE_STORAGE = "city_scrapers.httpcache.LRUFilesystemCacheStorage"
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_GZIP = True
+CITY_SCRAPERS_HTTPCACHE_MAX_MB = 50
+
+# Text extracted from PDFs is kept in this directory under the project data directory
+# and reused for identical PDFs, removing the least recently used text once it's
+# larger than CITY_SCRAPERS_PDF_CACHE_MAX_MB
+CITY_SCRAPERS_PDF_CACHE_DIR = "pdftext"
+CITY_SCRAPERS_PDF_CACHE_MAX_MB = 10
+
+# Download settings for hosts that several spiders use, applied to subdomains as well.
+# Delays are minimums that AutoThrottle can raise but not lower
+CITY_SCRAPERS_DOMAIN_SLOTS = {
+    "www.akronohio.gov": {"concurrency": 2, "delay": 1.0, "timeout": 60},
+    "onlinedocs.akronohio.gov": {"concurrency": 2, "delay": 1.0, "timeout": 60},
+    "co.summitoh.net": {"concurrency": 1, "delay": 2.0, "timeout": 60},
+    "clients6.google.com": {"concurrency": 8, "delay": 0, "timeout": 30},
+}
+DOWNLOAD_SLOTS = {
+    domain: {"concurrency": slot["concurrency"], "delay": slot["delay"]}
+    for domain, slot in CITY_SCRAPERS_DOMAIN_SLOTS.items()
 }
 
-# Use commands from city_scrapers_core package
+# Requests per second allowed to hosts shared by several spiders, across all crawl
+# processes on a machine. State is kept in CITY_SCRAPERS_RATE_LIMIT_DIR relative to
+# the project data directory
+CITY_SCRAPERS_RATE_LIMITS = {
+    "www.akronohio.gov": 1.0,
+    "onlinedocs.akronohio.gov": 1.0,
+    "co.summitoh.net": 1.0,
+}
+CITY_SCRAPERS_RATE_LIMIT_BURST = 1
+CITY_SCRAPERS_RATE_LIMIT_DIR = "rate_limits"
+
+# Drop requests to a host for the rest of the run after this many consecutive
+# connection errors, timeouts or server errors. Hosts are tried again after the reset
+# in seconds
+CITY_SCRAPERS_CIRCUIT_BREAKER_THRESHOLD = 5
+CITY_SCRAPERS_CIRCUIT_BREAKER_RESET = 60 * 60
+
+# Use commands from city_scrapers_core package along with project commands like
+# crawlall. Core commands are subclassed in city_scrapers.commands since scrapy only
+# supports a single commands module.
 
-COMMANDS_MODULE = "city_scrapers_core.commands"
+COMMANDS_MODULE = "city_scrapers.commands"
 
 EXTENSIONS = {
-    "scrapy.extensions.closespider.CloseSpider": None,
+    "city_scrapers.extensions.ThrottleStateExtension": 100,
+    "city_scrapers.extensions.OutputChangesExtension": 100,
+    "city_scrapers.extensions.BudgetExtension": 100,
 }
 
 CLOSESPIDER_ERRORCOUNT = 5
 
+# Close spiders that run longer than this many seconds, keeping what they've scraped.
+# Spiders can override it in custom_settings, and 0 disables the limit
+CLOSESPIDER_TIMEOUT = float(os.getenv("CLOSESPIDER_TIMEOUT", 60 * 60))
+
+# Close spiders while the process uses more than this much memory. Only enforced for
+# a spider running alone in its process, like with crawlall --concurrency 1, since
+# memory can't be attributed to one of several spiders. 0 disables the limit, but
+# memory is still sampled every CITY_SCRAPERS_BUDGET_CHECK_INTERVAL seconds
+CITY_SCRAPERS_MEMORY_BUDGET_MB = float(os.getenv("CITY_SCRAPERS_MEMORY_BUDGET_MB", 0))
+CITY_SCRAPERS_BUDGET_CHECK_INTERVAL = 10.0
+
+# Recent wall times for each spider used by crawlall to start the longest ones first,
+# relative to the project data directory (.scrapy)
+CITY_SCRAPERS_HISTORY_FILE = "crawl_history.json"
+
+# Seconds between runs of each spider with `scrapy daemon`. Intervals are adjusted
+# between the min and max for how often each spider's output has changed, and can be
+# fixed for individual spiders by name in CITY_SCRAPERS_DAEMON_INTERVALS
+CITY_SCRAPERS_DAEMON_INTERVAL = float(
+    os.getenv("CITY_SCRAPERS_DAEMON_INTERVAL", 24 * 60 * 60)
+)
+CITY_SCRAPERS_DAEMON_MIN_INTERVAL = 6 * 60 * 60
+CITY_SCRAPERS_DAEMON_MAX_INTERVAL = 7 * 24 * 60 * 60
+CITY_SCRAPERS_DAEMON_INTERVALS = {}
+
+# Meeting IDs and links from the last finished run of each spider, used to record
+# when its output changes in the crawl history
+CITY_SCRAPERS_OUTPUT_DIR = "outputs"
+
+# SQLite queue that `scrapy enqueue` fills and `scrapy queueworker` processes pull
+# spiders from on one or more hosts. Leases expire after CITY_SCRAPERS_QUEUE_LEASE
+# seconds without a heartbeat so spiders from dead workers are run again
+CITY_SCRAPERS_QUEUE_FILE = "spider_queue.sqlite"
+CITY_SCRAPERS_QUEUE_LEASE = 300
+CITY_SCRAPERS_QUEUE_MAX_ATTEMPTS = 3
+
+# AutoThrottle delays and latencies for each download slot saved between runs, relative
+# to the project data directory. Slots not used for longer than the max age start
+# from AUTOTHROTTLE_START_DELAY again
+CITY_SCRAPERS_THROTTLE_STATE_FILE = "throttle_state.json"
+CITY_SCRAPERS_THROTTLE_STATE_MAX_AGE = 7 * 24 * 60 * 60
+
 # Throttle results by default
 AUTOTHROTTLE_ENABLED = True
 AUTOTHROTTLE_START_DELAY = float(os.getenv("AUTOTHROTTLE_START_DELAY", 1.0))
@@ -54,7 +184,30 @@ AUTOTHROTTLE_TARGET_CONCURRENCY = float(
     os.getenv("AUTOTHROTTLE_TARGET_CONCURRENCY", 1.0)
 )
 
-SPIDER_MIDDLEWARES = {}
+SPIDER_MIDDLEWARES = {
+    "city_scrapers.middleware.CityScrapersChangeDetectionMiddleware": 45,
+    "city_scrapers.middleware.CityScrapersJobStateMiddleware": 50,
+    "city_scrapers.middleware.CityScrapersReplayMiddleware": 600,
+}
+
+# Raise the priority of requests for each callback between them and the start
+# requests so the detail pages of multi-step spiders are downloaded first. Spiders can
+# keep the order requests are yielded in with custom_settings = {"DEPTH_PRIORITY": 0}
+DEPTH_PRIORITY = -1
+
+# Directory under the project data directory where crawlall and other multi-spider
+# commands keep a JOBDIR for each spider so interrupted crawls can be resumed
+CITY_SCRAPERS_JOBDIR = os.getenv("CITY_SCRAPERS_JOBDIR")
+
+# Directory under the project data directory where spiders with change_detection
+# enabled keep the validators and items of their last run so they can skip crawling
+# sources that haven't changed. Disabled unless set
+CITY_SCRAPERS_CHANGE_DIR = None
+
+# Directory under the project data directory where the output of each callback is
+# saved so it can be yielded again for identical responses without parsing them.
+# Disabled unless set
+CITY_SCRAPERS_REPLAY_DIR = None
 
 # Disable noisy pdfminer logs which we aren't using
 logging.getLogger("pdfminer").propagate = False
@@ -10,12 +10,17 @@ ITEM_PIPELINES = {
     "city_scrapers_core.pipelines.OpenCivicDataPipeline": 400,
 }
 
+CITY_SCRAPERS_CHANGE_DIR = "changes"
+CITY_SCRAPERS_REPLAY_DIR = "replay"
+
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 
 EXTENSIONS = {
     "city_scrapers_core.extensions.AzureBlobStatusExtension": 100,
     "scrapy_sentry_errors.extensions.Errors": 10,
-    "scrapy.extensions.closespider.CloseSpider": None,
+    "city_scrapers.extensions.ThrottleStateExtension": 100,
+    "city_scrapers.extensions.OutputChangesExtension": 100,
+    "city_scrapers.extensions.BudgetExtension": 100,
 }
 
 FEED_EXPORTERS = {
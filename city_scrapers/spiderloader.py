@@ -0,0 +1,129 @@
+import ast
+import json
+import os
+from importlib import import_module
+from importlib.util import find_spec
+
+from scrapy.interfaces import ISpiderLoader
+from zope.interface import implementer
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def get_module_dir(module_name):
+    """Get the directory of a package without importing any of its modules"""
+    return find_spec(module_name).submodule_search_locations[0]
+
+
+def build_manifest(module_name):
+    """
+    Map spider names to the module and class defining them by reading the AST of each
+    module in a spiders package, so nothing in the package is imported.
+
+    :param module_name: Name of the package containing spiders
+    :return: Dictionary of spider names to dictionaries with "module" and "class" keys
+    """
+    manifest = {}
+    module_dir = get_module_dir(module_name)
+    for filename in sorted(os.listdir(module_dir)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        with open(os.path.join(module_dir, filename)) as f:
+            tree = ast.parse(f.read(), filename=filename)
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            spider_name = get_class_spider_name(node)
+            if spider_name:
+                manifest[spider_name] = {
+                    "module": "{}.{}".format(module_name, filename[:-3]),
+                    "class": node.name,
+                }
+    return manifest
+
+
+def get_class_spider_name(node):
+    """Get the string value of a `name` attribute from a class definition node"""
+    for stmt in node.body:
+        if (
+            isinstance(stmt, ast.Assign)
+            and any(
+                isinstance(target, ast.Name) and target.id == "name"
+                for target in stmt.targets
+            )
+            and isinstance(stmt.value, ast.Constant)
+            and isinstance(stmt.value.value, str)
+        ):
+            return stmt.value.value
+
+
+def get_manifest_path(module_name):
+    return os.path.join(get_module_dir(module_name), MANIFEST_FILENAME)
+
+
+def write_manifest(module_name):
+    """Regenerate the manifest file for a spiders package, returning its path"""
+    path = get_manifest_path(module_name)
+    with open(path, "w") as f:
+        json.dump(build_manifest(module_name), f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+@implementer(ISpiderLoader)
+class ManifestSpiderLoader:
+    """
+    Spider loader that reads spider names from the manifest.json file generated for
+    each package in SPIDER_MODULES and only imports a spider's module when it's
+    loaded. Listing spiders doesn't import any of them, and crawling a single spider
+    only imports that spider's dependencies.
+
+    Packages without a manifest are scanned directly. ``scrapy genspider`` updates
+    the manifest for new spiders, otherwise run ``scrapy manifest`` to regenerate
+    manifests after adding or renaming a spider.
+    """
+
+    def __init__(self, settings):
+        self.spider_modules = settings.getlist("SPIDER_MODULES")
+        self._manifest = {}
+        self._spiders = {}
+        for module_name in self.spider_modules:
+            manifest_path = get_manifest_path(module_name)
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    self._manifest.update(json.load(f))
+            else:
+                self._manifest.update(build_manifest(module_name))
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings)
+
+    def load(self, spider_name):
+        """
+        Return the Spider class for the given spider name, importing its module if it
+        hasn't been imported yet. If the spider name is not found, raise a KeyError.
+        """
+        if spider_name not in self._spiders:
+            try:
+                spider_info = self._manifest[spider_name]
+            except KeyError:
+                raise KeyError("Spider not found: {}".format(spider_name))
+            module = import_module(spider_info["module"])
+            self._spiders[spider_name] = getattr(module, spider_info["class"])
+        return self._spiders[spider_name]
+
+    def find_by_request(self, request):
+        """
+        Return the list of spider names that can handle the given request. This needs
+        to import every spider.
+        """
+        return [
+            name for name in self.list() if self.load(name).handles_request(request)
+        ]
+
+    def list(self):
+        """
+        Return a list with the names of all spiders available in the project.
+        """
+        return list(self._manifest.keys())
@@ -2,6 +2,7 @@ import re
 from datetime import datetime
 from email import policy
 from email.parser import BytesParser
+from io import BytesIO
 
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
@@ -12,6 +13,8 @@ class AkrAirportAuthoritySpider(CityScrapersSpider):
     name = "akr_airport_authority"
     agency = "Akron-Canton Airport Authority"
     timezone = "America/Detroit"
+    download_maxsize = 64 * 1024 * 1024
+    change_detection = True
     start_urls = [
         "https://city-scrapers-notice-emails.s3.amazonaws.com/akr_airport_authority/latest.eml"  # noqa
     ]
@@ -28,7 +31,7 @@ class AkrAirportAuthoritySpider(CityScrapersSpider):
         needs.
         """
         email_parser = BytesParser(policy=policy.default)
-        parsed_email = email_parser.parsebytes(response.body)
+        parsed_email = email_parser.parse(BytesIO(response.body))
         content = ""
         for part in parsed_email.iter_parts():
             if part.get_content_maintype() == "multipart":
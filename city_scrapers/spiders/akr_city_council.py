@@ -4,7 +4,10 @@ from datetime import datetime, time, timedelta
 from city_scrapers_core.constants import CITY_COUNCIL
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from dateutil.parser import parse
+
+from city_scrapers.utils import lazy_import
+
+dateutil_parser = lazy_import("dateutil.parser")
 
 
 class AkrCityCouncilSpider(CityScrapersSpider):
@@ -103,7 +106,7 @@ class AkrCityCouncilSpider(CityScrapersSpider):
             self.logger.error("No meeting time found - default to midnight")
             meeting_time = time(0, 0)
         else:
-            parsed_time = parse(meeting_time_str).time()
+            parsed_time = dateutil_parser.parse(meeting_time_str).time()
             meeting_time = parsed_time
 
         # Combine date and time into a single datetime object
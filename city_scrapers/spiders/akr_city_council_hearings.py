@@ -11,6 +11,7 @@ class AkrCityCouncilHearingsSpider(CityScrapersSpider):
     name = "akr_city_council_hearings"
     agency = "Akron City Council"
     timezone = "America/Detroit"
+    replay_responses = False
     start_urls = ["http://www.akroncitycouncil.org/upcoming-meetings/"]
     location = {
         "name": "City Hall, Council Chambers",
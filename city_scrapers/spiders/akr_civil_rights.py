@@ -2,19 +2,21 @@ import re
 from datetime import datetime
 from email.parser import BytesParser
 from email.policy import default
-from io import BytesIO, StringIO
+from io import BytesIO
 
 from city_scrapers_core.constants import COMMISSION
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
+
+from city_scrapers.pdf import extract_text
 
 
 class AkrCivilRightsSpider(CityScrapersSpider):
     name = "akr_civil_rights"
     agency = "Akron Civil Rights Commission"
     timezone = "America/Detroit"
+    download_maxsize = 64 * 1024 * 1024
+    change_detection = True
     start_urls = [
         "https://city-scrapers-notice-emails.s3.amazonaws.com/akr_civil_rights/latest.eml"  # noqa
     ]
@@ -30,7 +32,9 @@ class AkrCivilRightsSpider(CityScrapersSpider):
         Change the `_parse_title`, `_parse_start`, etc methods to fit your scraping
         needs.
         """
-        msg = BytesParser(policy=default).parsebytes(response.body)
+        # Parsing the bytes avoids decoding a str copy of the whole message, though
+        # the BytesIO still holds the full body
+        msg = BytesParser(policy=default).parse(BytesIO(response.body))
         attachments = list(msg.iter_attachments())
         pdf_list = [a for a in attachments if a.get_content_type() == "application/pdf"]
         if len(pdf_list) > 0:
@@ -41,10 +45,7 @@ class AkrCivilRightsSpider(CityScrapersSpider):
         yield self._parse_detail(detail_text)
 
     def _parse_pdf_text(self, pdf_bytes):
-        lp = LAParams(line_margin=0.1)
-        out_str = StringIO()
-        extract_text_to_fp(BytesIO(pdf_bytes), out_str, laparams=lp)
-        return re.sub(r"\s+", " ", out_str.getvalue()).strip()
+        return re.sub(r"\s+", " ", extract_text(pdf_bytes, self)).strip()
 
     def _parse_email_text(self, msg):
         content = ""
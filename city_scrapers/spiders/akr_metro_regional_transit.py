@@ -3,7 +3,10 @@ import re
 from city_scrapers_core.constants import BOARD, COMMITTEE, NOT_CLASSIFIED
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from dateutil.parser import parse
+
+from city_scrapers.utils import lazy_import
+
+dateutil_parser = lazy_import("dateutil.parser")
 
 
 class AkrMetroRegionalTransitSpider(CityScrapersSpider):
@@ -89,7 +92,7 @@ class AkrMetroRegionalTransitSpider(CityScrapersSpider):
         time_str = time_str.group(0) if time_str else None
         # combine date and time strings, use default if no time string found
         start_str = f"{date_str} {time_str or self.default_meeting_time}"
-        return parse(start_str)
+        return dateutil_parser.parse(start_str)
 
     def _parse_classification(self, title):
         if "committee" in title.lower():
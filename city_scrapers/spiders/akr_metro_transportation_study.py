@@ -9,22 +9,35 @@ from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 from dateutil.relativedelta import relativedelta
 
+from city_scrapers.mixins import FanOutMixin
 
-class AkrMetroTransportationStudySpider(CityScrapersSpider):
+
+class AkrMetroTransportationStudySpider(FanOutMixin, CityScrapersSpider):
     name = "akr_metro_transportation_study"
     agency = "Akron Metropolitan Area Transportation Study"
     timezone = "America/Detroit"
+    state_attrs = ["month_link_map", "fan_out_groups"]
     start_urls = ["http://amatsplanning.org/category/meetings/"]
 
-    def parse(self, response):
-        self.month_link_map = self._parse_archive(response)
+    def start_requests(self):
+        requests = {"archive": scrapy.Request(self.start_urls[0])}
         this_month = datetime.now().replace(day=1)
         for month in [this_month + relativedelta(months=m) for m in range(-2, 3)]:
-            yield scrapy.Request(
-                "http://amatsplanning.org/calendar/{}/".format(month.strftime("%Y-%m")),
-                callback=self._parse_calendar,
-                dont_filter=True,
+            month_str = month.strftime("%Y-%m")
+            requests[month_str] = scrapy.Request(
+                "http://amatsplanning.org/calendar/{}/".format(month_str)
             )
+        yield from self.fan_out(requests, self._parse_calendars)
+
+    def _parse_calendars(self, responses):
+        """Parse calendar months once they and the archive are all downloaded"""
+        archive_response = responses.pop("archive")
+        self.month_link_map = defaultdict(list)
+        if archive_response is not None:
+            self.month_link_map = self._parse_archive(archive_response)
+        for response in responses.values():
+            if response is not None:
+                yield from self._parse_calendar(response)
 
     def _parse_archive(self, response):
         month_link_map = defaultdict(list)
@@ -7,8 +7,10 @@ from city_scrapers_core.constants import BOARD, COMMITTEE
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
 
+from city_scrapers.mixins import FanOutMixin
 
-class AkrUniversitySpider(CityScrapersSpider):
+
+class AkrUniversitySpider(FanOutMixin, CityScrapersSpider):
     name = "akr_university"
     agency = "University of Akron"
     timezone = "America/Detroit"
@@ -16,6 +18,8 @@ class AkrUniversitySpider(CityScrapersSpider):
         "name": "University of Akron Student Union",
         "address": "303 Carroll St, Akron, OH 44304",
     }
+    state_attrs = ["fan_out_groups"]
+    replay_responses = False
 
     @property
     def start_urls(self):
@@ -24,14 +28,23 @@ class AkrUniversitySpider(CityScrapersSpider):
             + str(datetime.now().year)
         ]
 
-    def parse(self, response):
-        self.link_date_map = self._parse_docs(response)
-        yield scrapy.Request(
-            "https://www.uakron.edu/bot/meetings.dot",
-            callback=self._parse_schedule,
-            dont_filter=True,
+    def start_requests(self):
+        yield from self.fan_out(
+            {
+                "docs": scrapy.Request(self.start_urls[0]),
+                "schedule": scrapy.Request("https://www.uakron.edu/bot/meetings.dot"),
+            },
+            self._parse_meetings,
         )
 
+    def _parse_meetings(self, responses):
+        """Parse the schedule once it and the documents page are both downloaded"""
+        self.link_date_map = defaultdict(list)
+        if responses["docs"] is not None:
+            self.link_date_map = self._parse_docs(responses["docs"])
+        if responses["schedule"] is not None:
+            yield from self._parse_schedule(responses["schedule"])
+
     def _parse_docs(self, response):
         """Parse past Board materials by date"""
         link_date_map = defaultdict(list)
@@ -1,18 +1,19 @@
 import re
 from datetime import datetime
-from io import BytesIO, StringIO
 
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
+
+from city_scrapers.pdf import extract_text
 
 
 class AkrZoningAppealsSpider(CityScrapersSpider):
     name = "akr_zoning_appeals"
     agency = "Akron Board of Zoning Appeals"
     timezone = "America/Detroit"
+    download_maxsize = 64 * 1024 * 1024
+    change_detection = True
     start_urls = ["https://www.akronohio.gov/cms/site/462db8daed9dd330/index.html"]
     location = {
         "name": "Akron City Hall",
@@ -34,10 +35,9 @@ class AkrZoningAppealsSpider(CityScrapersSpider):
 
     def _parse_calendar(self, response):
         """Parse dates and details from schedule PDF"""
-        lp = LAParams(line_margin=0.1)
-        out_str = StringIO()
-        extract_text_to_fp(BytesIO(response.body), out_str, laparams=lp)
-        pdf_text = re.sub(r"\s+", " ", out_str.getvalue()).replace(" ,", ",")
+        pdf_text = re.sub(r"\s+", " ", extract_text(response.body, self)).replace(
+            " ,", ","
+        )
 
         for idx, date_str in enumerate(
             re.findall(r"[a-zA-Z]{3,10} \d{1,2}, \d{4}", pdf_text)
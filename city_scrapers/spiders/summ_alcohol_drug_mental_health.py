@@ -3,9 +3,12 @@ import json
 from city_scrapers_core.constants import BOARD
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from dateutil.parser import parse
 from w3lib.html import remove_tags
 
+from city_scrapers.utils import lazy_import
+
+dateutil_parser = lazy_import("dateutil.parser")
+
 
 class SummAlcoholDrugMentalHealthSpider(CityScrapersSpider):
     name = "summ_alcohol_drug_mental_health"
@@ -48,7 +51,7 @@ class SummAlcoholDrugMentalHealthSpider(CityScrapersSpider):
 
     def parse_datetime(self, dt_str):
         # Use dateutil's parse to automatically handle different datetime formats
-        return parse(dt_str).replace(tzinfo=None)
+        return dateutil_parser.parse(dt_str).replace(tzinfo=None)
 
     def parse_location(self, data):
         location_info = data.get("location", [{}])[0]
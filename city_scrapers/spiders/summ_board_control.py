@@ -10,6 +10,7 @@ class SummBoardControlSpider(CityScrapersSpider):
     name = "summ_board_control"
     agency = "Summit County Board of Control"
     timezone = "America/Detroit"
+    change_detection = True
     start_urls = [
         "https://co.summitoh.net/index.php/offices/boards-agencies-a-commissions/board-of-control"  # noqa
     ]
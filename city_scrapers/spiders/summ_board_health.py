@@ -11,6 +11,7 @@ class SummBoardHealthSpider(CityScrapersSpider):
     name = "summ_board_health"
     agency = "Summit County Board of Health"
     timezone = "America/Detroit"
+    change_detection = True
     start_urls = ["https://www.scph.org/board-health"]
     location = {
         "name": "Summit County Public Health Department Boardroom",
@@ -8,6 +8,8 @@ from city_scrapers_core.spiders import CityScrapersSpider
 from dateutil.relativedelta import relativedelta
 from scrapy import FormRequest
 
+from city_scrapers.mixins import FanOutMixin
+
 
 def rshift(val, n):
     """Replacement for JavaScript's >>> operator"""
@@ -99,7 +101,7 @@ def get_sucuri_cookie(sucuri_str):
     return parse_decoded_sucuri(sucuri_r)
 
 
-class SummChildrenServicesSpider(CityScrapersSpider):
+class SummChildrenServicesSpider(FanOutMixin, CityScrapersSpider):
     name = "summ_children_services"
     agency = "Summit County Children Services"
     timezone = "America/Detroit"
@@ -110,6 +112,8 @@ class SummChildrenServicesSpider(CityScrapersSpider):
         "name": "Summit County Children Services",
         "address": "264 S Arlington St, Akron, OH 44306",
     }
+    state_attrs = ["cookie", "link_date_map", "fan_out_groups"]
+    replay_responses = False
 
     def parse(self, response):
         """
@@ -123,21 +127,25 @@ class SummChildrenServicesSpider(CityScrapersSpider):
             r"(?<=('|\"))[a-zA-Z0-9+=]{100,10000}(?=('|\"))", script_str
         )
         self.cookie = get_sucuri_cookie(sucuri_match.group())
-        yield response.follow(
-            response.url,
-            callback=self._parse_documents_page,
-            headers={"Cookie": self.cookie},
-            dont_filter=True,
+        yield from self.fan_out(
+            {
+                "documents": response.follow(
+                    response.url, headers={"Cookie": self.cookie}
+                ),
+                "calendar": response.follow(
+                    "/Community-Action/Calendar", headers={"Cookie": self.cookie}
+                ),
+            },
+            self._parse_documents_calendar,
         )
 
-    def _parse_documents_page(self, response):
-        self.link_date_map = self._parse_documents(response)
-        yield response.follow(
-            "/Community-Action/Calendar",
-            headers={"Cookie": self.cookie},
-            callback=self._parse_calendar,
-            dont_filter=True,
-        )
+    def _parse_documents_calendar(self, responses):
+        """Parse the calendar once it and the documents page are both downloaded"""
+        self.link_date_map = defaultdict(list)
+        if responses["documents"] is not None:
+            self.link_date_map = self._parse_documents(responses["documents"])
+        if responses["calendar"] is not None:
+            yield from self._parse_calendar(responses["calendar"])
 
     def _parse_documents(self, response):
         link_date_map = defaultdict(list)
@@ -13,6 +13,7 @@ class SummDevelopmentalDisabilitiesSpider(CityScrapersSpider):
     name = "summ_developmental_disabilities"
     agency = "Summit County Developmental Disabilities Board"
     timezone = "America/Detroit"
+    state_attrs = ["month_meeting_map"]
     custom_settings = {"ROBOTSTXT_OBEY": False, "HTTPERROR_ALLOW_ALL": True}
 
     def __init__(self, *args, **kwargs):
@@ -2,20 +2,20 @@ import math
 import re
 from collections import defaultdict
 from datetime import datetime
-from io import BytesIO, StringIO
 
 from city_scrapers_core.constants import COMMISSION
 from city_scrapers_core.items import Meeting
 from city_scrapers_core.spiders import CityScrapersSpider
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
 from scrapy import Selector
 
+from city_scrapers.pdf import extract_text
+
 
 class SummPlanningSpider(CityScrapersSpider):
     name = "summ_planning"
     agency = "Summit County Planning Commission"
     timezone = "America/Detroit"
+    download_maxsize = 64 * 1024 * 1024
     start_urls = [
         "https://co.summitoh.net/index.php/departments/community-a-economic-development/planning"  # noqa
     ]
@@ -24,6 +24,7 @@ class SummPlanningSpider(CityScrapersSpider):
         "name": "County Council Chambers",
         "address": "175 S Main St, Akron, OH 44308",
     }
+    state_attrs = ["link_date_map"]
 
     def parse(self, response):
         """Parse links page and then parse PDF"""
@@ -54,10 +55,7 @@ class SummPlanningSpider(CityScrapersSpider):
         Change the `_parse_title`, `_parse_start`, etc methods to fit your scraping
         needs.
         """
-        lp = LAParams(line_margin=0.1)
-        out_str = StringIO()
-        extract_text_to_fp(BytesIO(response.body), out_str, laparams=lp)
-        pdf_text = out_str.getvalue()
+        pdf_text = extract_text(response.body, self)
         all_date_strs = re.findall(r"[A-Z][a-z]{2,8} \d{1,2}, \d{4}", pdf_text)
         # Get first half of the date strings, because these are the meeting dates
         date_strs = all_date_strs[: math.floor(len(all_date_strs) / 2)]
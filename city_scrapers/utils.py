@@ -0,0 +1,47 @@
+import sys
+from datetime import datetime
+from importlib import import_module
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    Placeholder for a module that imports it on first attribute access. Used for heavy
+    dependencies like pdfminer so they're only loaded by processes that need them.
+    """
+
+    def __getattr__(self, attr):
+        module = import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(module_name):
+    """Return a module that's imported the first time one of its attributes is used
+
+    :param module_name: Full name of the module, like "pdfminer.high_level"
+    :return: The module if it's already imported, otherwise a LazyModule
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    return LazyModule(module_name)
+
+
+def json_default(value):
+    """Serialize values like the datetimes in crawl stats for json.dump"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def match_domain(host, domains):
+    """Get the first of a list of domains that a host is equal to or a subdomain of
+
+    :param host: Hostname of a request
+    :param domains: Iterable of domains like "akronohio.gov"
+    :return: Matching domain or None
+    """
+    host = (host or "").lower()
+    for domain in domains:
+        if host == domain.lower() or host.endswith("." + domain.lower()):
+            return domain
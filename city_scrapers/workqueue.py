@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import time
+
+from scrapy.utils.project import data_path
+
+from .utils import json_default
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class SpiderQueue:
+    """
+    Queue of spider names in a SQLite file that crawl workers on one or more hosts pull
+    from. Workers lease a spider for a number of seconds and extend the lease with
+    heartbeats while it's running. If a worker dies its lease expires and the spider is
+    handed to the next worker that asks, up to a maximum number of attempts.
+
+    :param path: Path to the SQLite file, which is created if it doesn't exist
+    :param lease_seconds: Seconds a lease lasts without a heartbeat
+    :param max_attempts: Times a spider can be leased before it's marked as failed
+    :param clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, clock=time.time):
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                spider TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL,
+                stats TEXT
+            )""")
+
+    @classmethod
+    def from_settings(cls, settings, path=None):
+        """Create a queue from CITY_SCRAPERS_QUEUE_* settings, optionally overriding
+        the path of CITY_SCRAPERS_QUEUE_FILE
+        """
+        return cls(
+            data_path(path or settings.get("CITY_SCRAPERS_QUEUE_FILE")),
+            lease_seconds=settings.getfloat("CITY_SCRAPERS_QUEUE_LEASE"),
+            max_attempts=settings.getint("CITY_SCRAPERS_QUEUE_MAX_ATTEMPTS"),
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, spider_names):
+        """Replace the contents of the queue with spiders in the order to run them"""
+        with self._transaction():
+            self.conn.execute("DELETE FROM jobs")
+            self.conn.executemany(
+                "INSERT INTO jobs (spider, position, state) VALUES (?, ?, ?)",
+                [(name, idx, PENDING) for idx, name in enumerate(spider_names)],
+            )
+
+    def lease(self, worker):
+        """Lease the next pending spider (or one with an expired lease) to a worker
+
+        :param worker: Unique identifier of the worker
+        :return: Spider name, or None if there's nothing to lease right now
+        """
+        now = self.clock()
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, worker = NULL "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT spider FROM jobs WHERE state = ? "
+                "OR (state = ? AND lease_expires < ?) ORDER BY position LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, worker = ?, attempts = attempts + 1, "
+                "lease_expires = ? WHERE spider = ?",
+                (LEASED, worker, now + self.lease_seconds, row[0]),
+            )
+        return row[0]
+
+    def heartbeat(self, worker, spider_name):
+        """Extend a worker's lease, returning False if the worker no longer holds it"""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ? "
+            "WHERE spider = ? AND worker = ? AND state = ?",
+            (self.clock() + self.lease_seconds, spider_name, worker, LEASED),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, worker, spider_name, stats):
+        """Mark a spider as done and store the stats reported by its worker"""
+        self.conn.execute(
+            "UPDATE jobs SET state = ?, lease_expires = NULL, stats = ? "
+            "WHERE spider = ? AND worker = ? AND state = ?",
+            (
+                DONE,
+                json.dumps(stats, default=json_default),
+                spider_name,
+                worker,
+                LEASED,
+            ),
+        )
+
+    def is_finished(self):
+        """Whether every spider in the queue is done or has failed"""
+        now = self.clock()
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = ? "
+            "OR (state = ? AND (lease_expires >= ? OR attempts < ?))",
+            (PENDING, LEASED, now, self.max_attempts),
+        ).fetchone()
+        return row[0] == 0
+
+    def jobs(self):
+        """List each spider in the queue with its state, worker, attempts and stats"""
+        return [
+            {
+                "spider": spider,
+                "state": state,
+                "worker": worker,
+                "attempts": attempts,
+                "stats": json.loads(stats) if stats else {},
+            }
+            for spider, state, worker, attempts, stats in self.conn.execute(
+                "SELECT spider, state, worker, attempts, stats FROM jobs "
+                "ORDER BY position"
+            )
+        ]
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+
+class _Transaction:
+    """Holds the database write lock so that two workers can't lease the same spider"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -5,6 +5,7 @@ import pytest  # noqa
 from city_scrapers_core.constants import ADVISORY_COMMITTEE, PASSED
 from city_scrapers_core.utils import file_response
 from freezegun import freeze_time
+from twisted.python.failure import Failure
 
 from city_scrapers.spiders.akr_metro_transportation_study import (
     AkrMetroTransportationStudySpider,
@@ -90,3 +91,37 @@ def test_classification():
 
 def test_all_day():
     assert parsed_item["all_day"] is False
+
+
+@freeze_time("2019-09-30")
+def test_parse_calendars(caplog):
+    calendar_spider = AkrMetroTransportationStudySpider()
+    requests = list(calendar_spider.start_requests())
+    assert [request.meta["fan_out"][1] for request in requests] == [
+        "archive",
+        "2019-07",
+        "2019-08",
+        "2019-09",
+        "2019-10",
+        "2019-11",
+    ]
+    output = []
+    for request in requests:
+        key = request.meta["fan_out"][1]
+        if key == "archive":
+            output += request.callback(test_docs_response.replace(request=request))
+        elif key == "2019-09":
+            # Calendar pages list their events in the same format as event pages
+            calendar_response = test_response.replace(url=request.url, request=request)
+            output += request.callback(calendar_response)
+        else:
+            failure = Failure(ValueError())
+            failure.request = request
+            output += request.errback(failure)
+
+    # Events are only requested once every page in the group is done
+    assert [request.url for request in output] == [test_response.url]
+    assert output[0].callback == calendar_spider._parse_event
+    assert "May 2019" in calendar_spider.month_link_map
+    assert calendar_spider.fan_out_groups == {}
+    assert [record.levelname for record in caplog.records] == ["ERROR"] * 4
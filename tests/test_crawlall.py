@@ -0,0 +1,171 @@
+import json
+import sys
+from argparse import Namespace
+from unittest.mock import Mock
+
+import pytest  # noqa
+from scrapy.settings import Settings
+from twisted.internet.defer import Deferred
+
+from city_scrapers.commands import crawlall
+from city_scrapers.history import CrawlHistory
+
+
+class FakeCrawlerProcess:
+    """Runs crawls in the order they finish without starting a reactor"""
+
+    def __init__(self, spider_names, stats=None):
+        self.spider_loader = Mock()
+        self.spider_loader.list.return_value = spider_names
+        self.stats = stats or {}
+        self.bootstrap_failed = False
+        self.running = {}
+        self.started = []
+        self.max_running = 0
+
+    def create_crawler(self, name):
+        crawler = Mock()
+        crawler.name = name
+        crawler.settings = Settings()
+        crawler.stats.get_stats.return_value = self.stats.get(
+            name, {"finish_reason": "finished"}
+        )
+        return crawler
+
+    def crawl(self, crawler):
+        self.running[crawler.name] = Deferred()
+        self.started.append(crawler.name)
+        self.max_running = max(self.max_running, len(self.running))
+        return self.running[crawler.name]
+
+    def start(self):
+        while self.running:
+            name = next(iter(self.running))
+            self.running.pop(name).callback(None)
+
+
+def get_command(spider_names, settings=None, stats=None, command_cls=None):
+    command = (command_cls or crawlall.Command)()
+    command.settings = Settings(settings or {})
+    command.crawler_process = FakeCrawlerProcess(spider_names, stats)
+    return command
+
+
+def get_opts(**kwargs):
+    return Namespace(
+        **{
+            "exclude": [],
+            "stats_file": None,
+            "workers": 1,
+            "concurrency": 0,
+            "history": True,
+            "set": [],
+            "loglevel": None,
+            "nolog": False,
+            **kwargs,
+        }
+    )
+
+
+def test_run_crawlers():
+    command = get_command(["a", "b", "c"])
+    spider_stats = command.run_crawlers(["a", "b", "c"])
+    assert command.crawler_process.started == ["a", "b", "c"]
+    assert command.crawler_process.max_running == 3
+    assert spider_stats == {name: {"finish_reason": "finished"} for name in "abc"}
+
+
+def test_run_crawlers_concurrency():
+    command = get_command(["a", "b", "c"])
+    command.run_crawlers(["c", "a", "b"], concurrency=2)
+    # Each spider starts once an earlier one finishes
+    assert command.crawler_process.started == ["c", "a", "b"]
+    assert command.crawler_process.max_running == 2
+
+
+def test_run_crawlers_jobdir():
+    command = get_command(["a"], settings={"CITY_SCRAPERS_JOBDIR": "jobs"})
+    crawler = command.create_crawler("a")
+    assert crawler.settings["JOBDIR"].endswith("jobs/a")
+
+
+def test_get_worker_args():
+    command = get_command(["a", "b"])
+    opts = get_opts(concurrency=2, set=["LOG_FILE=crawl.log"], loglevel="INFO")
+    assert command.get_worker_args(["a", "b"], "worker-0.json", opts) == [
+        sys.executable,
+        "-m",
+        "scrapy",
+        "crawlall",
+        "a",
+        "b",
+        "--stats-file",
+        "worker-0.json",
+        "--no-history",
+        "--concurrency",
+        "2",
+        "-s",
+        "LOG_FILE=crawl.log",
+        "-L",
+        "INFO",
+    ]
+
+
+def test_run_workers(monkeypatch):
+    def popen(args):
+        # Workers write the stats of their spiders before exiting
+        spider_names = args[4 : args.index("--stats-file")]
+        with open(args[args.index("--stats-file") + 1], "w") as f:
+            json.dump({name: {"item_scraped_count": 1} for name in spider_names}, f)
+        return Mock(wait=Mock(return_value=1 if "c" in spider_names else 0))
+
+    monkeypatch.setattr(crawlall.subprocess, "Popen", popen)
+    command = get_command(["a", "b", "c"])
+    spider_stats = command.run_workers([["a", "b"], ["c"]], get_opts(workers=2))
+    assert spider_stats == {name: {"item_scraped_count": 1} for name in "abc"}
+    assert command.exitcode == 1
+
+
+def test_run_history(tmp_path, monkeypatch):
+    history_path = str(tmp_path / "history.json")
+    history = CrawlHistory(history_path)
+    history.record(
+        {
+            name: {"elapsed_time_seconds": elapsed}
+            for name, elapsed in {"a": 10, "b": 30, "c": 20, "d": 15}.items()
+        }
+    )
+    history.save()
+    command = get_command(
+        ["a", "b", "c", "d"], settings={"CITY_SCRAPERS_HISTORY_FILE": history_path}
+    )
+    calls = []
+
+    def run_crawlers(spider_names, concurrency=0):
+        calls.append(spider_names)
+        return {name: {"finish_reason": "finished"} for name in spider_names}
+
+    def run_workers(shards, opts):
+        calls.append(shards)
+        return {
+            name: {
+                "finish_reason": "closespider_timeout" if name == "a" else "finished",
+                "elapsed_time_seconds": 10,
+            }
+            for shard in shards
+            for name in shard
+        }
+
+    monkeypatch.setattr(command, "run_crawlers", run_crawlers)
+    monkeypatch.setattr(command, "run_workers", run_workers)
+
+    # The longest spiders are started first
+    command.run(["a", "b", "c"], get_opts(history=False))
+    assert calls.pop() == ["b", "c", "a"]
+    assert command.exitcode == 0
+
+    # Shards are balanced by predicted time
+    command.run([], get_opts(workers=2, concurrency=1))
+    assert calls.pop() == [["b", "a"], ["c", "d"]]
+    assert command.exitcode == 1
+    assert len(CrawlHistory(history_path).spiders["a"]) == 2
@@ -0,0 +1,49 @@
+from argparse import Namespace
+from unittest.mock import Mock
+
+import pytest  # noqa
+from scrapy.settings import Settings
+from twisted.internet import reactor, task
+
+from city_scrapers.commands import daemon
+from city_scrapers.history import CrawlHistory
+
+from .test_queueworker import ScenarioCrawlerProcess
+
+
+def test_daemon(tmp_path, monkeypatch):
+    clock = task.Clock()
+    monkeypatch.setattr(reactor, "callLater", clock.callLater)
+    monkeypatch.setattr(daemon, "time", Mock(monotonic=clock.seconds))
+    history_path = str(tmp_path / "history.json")
+
+    def scenario(process):
+        assert process.started == ["a", "b"]
+        clock.advance(30)
+        process.finish("a")
+        # Runs are scheduled from when the last one started
+        clock.advance(69)
+        assert process.started == ["a", "b"]
+        clock.advance(1)
+        assert process.started == ["a", "b", "a"]
+
+        process.finish("b")
+        [b_call] = [call for call in clock.getDelayedCalls() if call.args == ("b",)]
+        assert b_call.getTime() == 1000
+
+    command = daemon.Command()
+    command.settings = Settings(
+        {
+            "CITY_SCRAPERS_HISTORY_FILE": history_path,
+            "CITY_SCRAPERS_DAEMON_INTERVAL": 1000,
+            "CITY_SCRAPERS_DAEMON_MIN_INTERVAL": 10,
+            "CITY_SCRAPERS_DAEMON_MAX_INTERVAL": 5000,
+            "CITY_SCRAPERS_DAEMON_INTERVALS": {"a": 100},
+        }
+    )
+    command.crawler_process = ScenarioCrawlerProcess(
+        ["a", "b"], scenario, stats={"a": {"elapsed_time_seconds": 30}}
+    )
+    command.run([], Namespace(exclude=[]))
+    # Each finished run is recorded
+    assert len(CrawlHistory(history_path).spiders["a"]) == 1
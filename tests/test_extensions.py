@@ -0,0 +1,170 @@
+import json
+from unittest.mock import Mock
+
+import pytest  # noqa
+from city_scrapers_core.items import Meeting
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.extensions import (
+    BudgetExtension,
+    OutputChangesExtension,
+    ThrottleStateExtension,
+)
+from city_scrapers.spiders.summ_board_health import SummBoardHealthSpider
+
+spider = SummBoardHealthSpider()
+
+
+def run_output_changes(tmp_path, items, reason="finished"):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_OUTPUT_DIR": str(tmp_path)})
+    ext = OutputChangesExtension.from_crawler(crawler)
+    for item in items:
+        ext.item_scraped(item, spider)
+    ext.spider_closed(spider, reason)
+    return crawler.stats
+
+
+def test_output_changes(tmp_path):
+    first = Meeting(id="a", links=[{"href": "https://example.com/agenda.pdf"}])
+    second = Meeting(id="b", links=[])
+    stats = run_output_changes(tmp_path, [first])
+    assert stats.get_value("output/added_count") is None
+
+    stats = run_output_changes(tmp_path, [first])
+    assert stats.get_value("output/added_count") == 0
+    assert stats.get_value("output/removed_count") == 0
+
+    stats = run_output_changes(tmp_path, [second], reason="shutdown")
+    assert stats.get_value("output/added_count") is None
+
+    stats = run_output_changes(tmp_path, [Meeting(id="a", links=[]), second])
+    assert stats.get_value("output/added_count") == 1
+    assert stats.get_value("output/removed_count") == 1
+
+
+def test_output_changes_failed_run(tmp_path):
+    first = Meeting(id="a", links=[])
+    run_output_changes(tmp_path, [first])
+
+    # Runs where every request failed still close as finished
+    stats = run_output_changes(tmp_path, [])
+    assert stats.get_value("output/removed_count") is None
+
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_OUTPUT_DIR": str(tmp_path)})
+    crawler.stats.inc_value("log_count/ERROR")
+    ext = OutputChangesExtension.from_crawler(crawler)
+    ext.item_scraped(Meeting(id="b", links=[]), spider)
+    ext.spider_closed(spider, "finished")
+    assert crawler.stats.get_value("output/removed_count") is None
+
+    stats = run_output_changes(tmp_path, [first])
+    assert stats.get_value("output/added_count") == 0
+    assert stats.get_value("output/removed_count") == 0
+
+
+def test_budget_time_setting():
+    from city_scrapers.settings import archive, base
+
+    assert base.CLOSESPIDER_TIMEOUT == 60 * 60
+    assert archive.CLOSESPIDER_TIMEOUT == 4 * 60 * 60
+    assert "scrapy.extensions.closespider.CloseSpider" not in base.EXTENSIONS
+
+
+def test_budget_memory(monkeypatch):
+    monkeypatch.setattr(BudgetExtension, "running", set())
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_MEMORY_BUDGET_MB": 1})
+    crawler.engine = Mock()
+    ext = BudgetExtension.from_crawler(crawler)
+    ext.running.add(ext)
+    ext.check_memory(spider)
+    crawler.engine.close_spider.assert_called_once_with(
+        spider, "memory_budget_exceeded"
+    )
+    assert crawler.stats.get_value("budget/exceeded") == "memory"
+    assert crawler.stats.get_value("budget/max_rss_mb") > 1
+
+
+def test_budget_memory_shared(monkeypatch):
+    monkeypatch.setattr(BudgetExtension, "running", set())
+    crawlers = [
+        get_crawler(settings_dict={"CITY_SCRAPERS_MEMORY_BUDGET_MB": 1})
+        for _ in range(2)
+    ]
+    exts = [BudgetExtension.from_crawler(crawler) for crawler in crawlers]
+    for crawler, ext in zip(crawlers, exts):
+        crawler.engine = Mock()
+        ext.running.add(ext)
+    exts[0].check_memory(spider)
+    crawlers[0].engine.close_spider.assert_not_called()
+    assert crawlers[0].stats.get_value("budget/exceeded") is None
+    assert crawlers[0].stats.get_value("budget/memory_exceeded_shared") is True
+
+
+def test_budget_peak_stats():
+    crawler = get_crawler()
+    ext = BudgetExtension.from_crawler(crawler)
+    request = Request("https://example.com/agenda.pdf")
+    for body in [b"%PDF-1.4 agenda packet", b"%PDF"]:
+        ext.response_received(Response(request.url, body=body), request, spider)
+    ext.spider_closed(spider)
+    assert crawler.stats.get_value("budget/max_response_bytes") == 22
+    assert crawler.stats.get_value("budget/process_peak_rss_mb") > 1
+
+
+def test_budget_sampled_without_limit(monkeypatch):
+    monkeypatch.setattr(BudgetExtension, "running", set())
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_BUDGET_CHECK_INTERVAL": 10})
+    crawler.engine = Mock()
+    ext = BudgetExtension.from_crawler(crawler)
+    ext.spider_opened(spider)
+    # The first sample is taken as soon as the spider opens
+    assert ext.memory_check.running
+    assert crawler.stats.get_value("budget/max_rss_mb") > 1
+    ext.spider_closed(spider)
+    assert not ext.memory_check.running
+    crawler.engine.close_spider.assert_not_called()
+
+
+def get_throttle_state(tmp_path, monkeypatch, delay=1.0):
+    monkeypatch.setattr(ThrottleStateExtension, "slot_state", {})
+    monkeypatch.setattr(ThrottleStateExtension, "loaded_paths", set())
+    crawler = get_crawler(
+        settings_dict={
+            "AUTOTHROTTLE_ENABLED": True,
+            "AUTOTHROTTLE_MAX_DELAY": 30.0,
+            "DOWNLOAD_DELAY": 0.5,
+            "CITY_SCRAPERS_THROTTLE_STATE_FILE": str(tmp_path / "throttle.json"),
+            "CITY_SCRAPERS_THROTTLE_STATE_MAX_AGE": 3600,
+        }
+    )
+    crawler.engine = Mock()
+    crawler.engine.downloader.slots = {"example.com": Mock(delay=delay)}
+    return ThrottleStateExtension.from_crawler(crawler)
+
+
+def test_throttle_state_warm_start(tmp_path, monkeypatch):
+    request = Request(
+        "https://example.com",
+        meta={"download_slot": "example.com", "download_latency": 2.0},
+    )
+    ext = get_throttle_state(tmp_path, monkeypatch)
+    ext.request_reached_downloader(request, spider)
+    ext.crawler.engine.downloader.slots["example.com"].delay = 4.0
+    ext.response_downloaded(Response(request.url), request, spider)
+    ext.spider_closed(spider)
+    with open(tmp_path / "throttle.json") as f:
+        saved = json.load(f)
+    assert saved["example.com"]["delay"] == 4.0
+    assert saved["example.com"]["latency"] == 2.0
+
+    ext = get_throttle_state(tmp_path, monkeypatch)
+    ext.request_reached_downloader(request, spider)
+    assert ext.crawler.engine.downloader.slots["example.com"].delay == 4.0
+
+    saved["example.com"]["updated"] -= 7200
+    with open(tmp_path / "throttle.json", "w") as f:
+        json.dump(saved, f)
+    ext = get_throttle_state(tmp_path, monkeypatch)
+    ext.request_reached_downloader(request, spider)
+    assert ext.crawler.engine.downloader.slots["example.com"].delay == 1.0
@@ -0,0 +1,97 @@
+import pickle
+from os.path import dirname, join
+
+import pytest  # noqa
+from city_scrapers_core.utils import file_response
+from freezegun import freeze_time
+from scrapy.http import Request
+from scrapy.utils.request import request_from_dict
+from twisted.python.failure import Failure
+
+from city_scrapers.spiders.akr_university import AkrUniversitySpider
+
+test_response = file_response(
+    join(dirname(__file__), "files", "akr_university.html"),
+    url="https://www.uakron.edu/bot/meetings.dot",
+)
+test_docs_response = file_response(
+    join(dirname(__file__), "files", "akr_university_docs.html"),
+    url="https://www.uakron.edu/bot/board-memos.dot?folderPath=/bot/docs/2019",
+)
+
+
+def get_response(request, response):
+    return response.replace(request=request)
+
+
+@freeze_time("2019-09-30")
+def test_fan_out():
+    spider = AkrUniversitySpider()
+    requests = list(spider.start_requests())
+    assert [request.meta["fan_out"][1] for request in requests] == [
+        "docs",
+        "schedule",
+    ]
+    assert all(request.dont_filter for request in requests)
+
+    schedule_request = requests[1]
+    assert (
+        list(schedule_request.callback(get_response(schedule_request, test_response)))
+        == []
+    )
+
+    docs_request = requests[0]
+    items = list(docs_request.callback(get_response(docs_request, test_docs_response)))
+    assert len(items) == 10
+    assert items[0]["links"][0]["title"] == "Materials"
+    assert spider.fan_out_groups == {}
+
+
+@freeze_time("2019-09-30")
+def test_fan_out_error(caplog):
+    spider = AkrUniversitySpider()
+    docs_request, schedule_request = spider.start_requests()
+    failure = Failure(ValueError())
+    failure.request = docs_request
+    assert list(docs_request.errback(failure)) == []
+    assert [record.levelname for record in caplog.records] == ["ERROR"]
+
+    items = list(
+        schedule_request.callback(get_response(schedule_request, test_response))
+    )
+    assert len(items) == 10
+    assert items[0]["links"] == [
+        {"title": "Livestream", "href": "https://learn.uakron.edu/video/bot/"}
+    ]
+
+
+def test_fan_out_unknown_group():
+    spider = AkrUniversitySpider()
+    request = Request(test_response.url, meta={"fan_out": (0, "schedule")})
+    assert list(spider._fan_in(get_response(request, test_response))) == []
+
+
+@freeze_time("2019-09-30")
+def test_fan_out_resume():
+    spider = AkrUniversitySpider()
+    docs_request, schedule_request = spider.start_requests()
+    list(schedule_request.callback(get_response(schedule_request, test_response)))
+    # State saved by the job state middleware when the crawl stops
+    state = pickle.dumps({attr: getattr(spider, attr) for attr in spider.state_attrs})
+    queued_request = docs_request.to_dict(spider=spider)
+
+    resumed_spider = AkrUniversitySpider()
+    for attr, value in pickle.loads(state).items():
+        setattr(resumed_spider, attr, value)
+    docs_request = request_from_dict(queued_request, spider=resumed_spider)
+    [schedule_request] = list(
+        docs_request.callback(get_response(docs_request, test_docs_response))
+    )
+    assert schedule_request.url == test_response.url
+
+    items = list(
+        schedule_request.callback(get_response(schedule_request, test_response))
+    )
+    assert len(items) == 10
+    assert items[0]["links"][0]["title"] == "Materials"
+    assert resumed_spider.fan_out_groups == {}
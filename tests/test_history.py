@@ -0,0 +1,114 @@
+import json
+from datetime import datetime
+from os.path import join
+
+import pytest  # noqa
+from freezegun import freeze_time
+
+from city_scrapers.history import CrawlHistory
+
+
+def make_history(tmp_path, elapsed_map):
+    history = CrawlHistory(join(tmp_path, "history.json"))
+    history.record(
+        {
+            name: {"elapsed_time_seconds": elapsed, "item_scraped_count": 1}
+            for name, elapsed in elapsed_map.items()
+        }
+    )
+    return history
+
+
+def test_save_load(tmp_path):
+    history = make_history(tmp_path, {"a": 10})
+    history.save()
+    loaded = CrawlHistory(history.path)
+    assert loaded.spiders["a"][0]["elapsed"] == 10
+    assert loaded.spiders["a"][0]["items"] == 1
+
+
+def test_estimate(tmp_path):
+    history = make_history(tmp_path, {"a": 10, "b": 30})
+    history.record({"a": {"elapsed_time_seconds": 20}})
+    assert history.estimate("a") == 15
+    assert history.estimate("unknown") == 30
+
+
+def test_order(tmp_path):
+    history = make_history(tmp_path, {"a": 10, "b": 30, "c": 20})
+    assert history.order(["a", "b", "c"]) == ["b", "c", "a"]
+
+
+def test_makespan(tmp_path):
+    history = make_history(tmp_path, {"a": 10, "b": 30, "c": 20})
+    assert history.makespan(["b", "c", "a"]) == 30
+    assert history.makespan(["b", "c", "a"], concurrency=1) == 60
+    assert history.makespan(["b", "c", "a"], concurrency=2) == 30
+
+
+def test_shard(tmp_path):
+    history = make_history(tmp_path, {"a": 10, "b": 30, "c": 20, "d": 15})
+    assert history.shard(["a", "b", "c", "d"], 2, concurrency=1) == [
+        ["b", "a"],
+        ["c", "d"],
+    ]
+
+
+def record_output(history, name, changed):
+    history.record(
+        {
+            name: {
+                "elapsed_time_seconds": 10,
+                "output/added_count": int(changed),
+                "output/removed_count": 0,
+            }
+        }
+    )
+
+
+def test_load_runs_only(tmp_path):
+    path = join(tmp_path, "history.json")
+    with open(path, "w") as f:
+        json.dump({"a": [{"elapsed": 10}]}, f)
+    history = CrawlHistory(path)
+    assert history.estimate("a") == 10
+    assert history.changes == {}
+
+
+def test_record_changes(tmp_path):
+    history = CrawlHistory(join(tmp_path, "history.json"))
+    history.record({"a": {"elapsed_time_seconds": 10}})
+    assert "a" not in history.changes
+    with freeze_time("2020-01-01"):
+        record_output(history, "a", False)
+    with freeze_time("2020-01-02"):
+        record_output(history, "a", True)
+    history.save()
+    loaded = CrawlHistory(history.path)
+    assert loaded.changes["a"] == {
+        "since": "2020-01-01T00:00:00",
+        "times": ["2020-01-02T00:00:00"],
+    }
+
+
+def test_max_changes(tmp_path):
+    history = CrawlHistory(join(tmp_path, "history.json"))
+    for day in range(1, 13):
+        with freeze_time(datetime(2020, 1, day)):
+            record_output(history, "a", True)
+    assert len(history.changes["a"]["times"]) == 10
+    assert history.changes["a"]["since"] == "2020-01-02T00:00:00"
+
+
+def test_interval(tmp_path):
+    day = 24 * 60 * 60
+    history = CrawlHistory(join(tmp_path, "history.json"))
+    assert history.interval("a", day, day / 4, day * 7) == day
+    for idx in range(1, 11):
+        with freeze_time(datetime(2020, 1, idx)):
+            record_output(history, "frequent", True)
+            record_output(history, "rare", idx == 1)
+    now = datetime(2020, 1, 11)
+    assert history.interval("frequent", day, day / 4, day * 7, now=now) == 12 * day / 22
+    assert history.interval("rare", day, day / 4, day * 7, now=now) == day * 3
+    assert history.interval("rare", day, day / 4, day * 2, now=now) == day * 2
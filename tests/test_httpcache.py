@@ -0,0 +1,95 @@
+import os
+
+import pytest  # noqa
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.middleware import CityScrapersHttpCacheMiddleware
+from city_scrapers.spiders.summ_board_health import SummBoardHealthSpider
+
+
+def get_middleware(tmp_path, max_mb=0):
+    crawler = get_crawler(
+        SummBoardHealthSpider,
+        settings_dict={
+            "HTTPCACHE_ENABLED": True,
+            "HTTPCACHE_DIR": str(tmp_path),
+            "HTTPCACHE_POLICY": "city_scrapers.httpcache.ConditionalCachePolicy",
+            "HTTPCACHE_STORAGE": "city_scrapers.httpcache.LRUFilesystemCacheStorage",
+            "CITY_SCRAPERS_HTTPCACHE_MAX_MB": max_mb,
+        },
+    )
+    spider = crawler._create_spider()
+    middleware = CityScrapersHttpCacheMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+    return crawler, middleware, spider
+
+
+def fetch(middleware, spider, url, status=200, headers=None, body=b"<p>Agenda</p>"):
+    request = Request(url)
+    cached = middleware.process_request(request, spider)
+    if cached is not None:
+        return request, cached
+    response = HtmlResponse(
+        url, status=status, headers=headers, body=body, request=request
+    )
+    return request, middleware.process_response(request, response, spider)
+
+
+def test_not_modified(tmp_path):
+    crawler, middleware, spider = get_middleware(tmp_path)
+    url = "https://www.scph.org/board-health"
+    fetch(
+        middleware, spider, url, headers={"ETag": '"a"', "Cache-Control": "max-age=600"}
+    )
+
+    request, response = fetch(middleware, spider, url, status=304, body=b"")
+    assert request.headers["If-None-Match"] == b'"a"'
+    assert response.status == 200
+    assert response.body == b"<p>Agenda</p>"
+    assert crawler.stats.get_value("httpcache/bytes_saved") == len(response.body)
+
+
+def test_modified(tmp_path):
+    crawler, middleware, spider = get_middleware(tmp_path)
+    url = "https://www.scph.org/board-health"
+    fetch(middleware, spider, url, headers={"Last-Modified": "Tue, 01 Oct 2019"})
+    request, response = fetch(middleware, spider, url, body=b"<p>Minutes</p>")
+    assert request.headers["If-Modified-Since"] == b"Tue, 01 Oct 2019"
+    assert response.body == b"<p>Minutes</p>"
+    assert crawler.stats.get_value("httpcache/bytes_saved") is None
+
+
+def test_no_validators(tmp_path):
+    crawler, middleware, spider = get_middleware(tmp_path)
+    url = "https://www.scph.org/board-health"
+    fetch(middleware, spider, url)
+    request, _ = fetch(middleware, spider, url)
+    assert "If-None-Match" not in request.headers
+    assert crawler.stats.get_value("httpcache/uncacheable") == 2
+
+
+def test_evict(tmp_path):
+    crawler, middleware, spider = get_middleware(tmp_path, max_mb=0.01)
+    for idx in range(3):
+        fetch(
+            middleware,
+            spider,
+            "https://www.scph.org/{}".format(idx),
+            headers={"ETag": str(idx)},
+            body=os.urandom(4096),
+        )
+    # Reading the first response makes the second the least recently used
+    fetch(middleware, spider, "https://www.scph.org/0", status=304, body=b"")
+    middleware.spider_closed(spider)
+
+    _, middleware, spider = get_middleware(tmp_path, max_mb=0.01)
+    cached = [
+        middleware.storage.retrieve_response(
+            spider, Request("https://www.scph.org/{}".format(idx))
+        )
+        is not None
+        for idx in range(3)
+    ]
+    assert cached == [True, False, True]
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from city_scrapers.spiderloader import build_manifest
+
+# Milliseconds each spider module can take to import on top of scrapy and
+# city_scrapers_core. Heavy dependencies should use city_scrapers.utils.lazy_import
+IMPORT_BUDGET_MS = 50
+LAZY_MODULES = ["pdfminer", "dateutil.parser"]
+
+MEASURE_SCRIPT = """
+import json
+import os
+import sys
+import time
+
+import city_scrapers_core.constants
+import city_scrapers_core.items
+import city_scrapers_core.spiders
+import scrapy
+
+lazy_modules = json.loads(sys.argv[1])
+results = {}
+for module_name in sys.argv[2:]:
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        os.close(read_fd)
+        start = time.perf_counter()
+        __import__(module_name)
+        result = {
+            "ms": (time.perf_counter() - start) * 1000,
+            "lazy": [m for m in lazy_modules if m in sys.modules],
+        }
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        results[module_name] = json.load(f)
+    os.wait()
+print(json.dumps(results))
+"""
+
+spider_modules = sorted(
+    {spider["module"] for spider in build_manifest("city_scrapers.spiders").values()}
+)
+
+
+@pytest.fixture(scope="module")
+def import_results():
+    output = subprocess.check_output(
+        [sys.executable, "-c", MEASURE_SCRIPT, json.dumps(LAZY_MODULES)]
+        + spider_modules
+    )
+    return json.loads(output)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork")
+def test_import_budget(import_results):
+    over_budget = {
+        module_name: round(result["ms"], 1)
+        for module_name, result in import_results.items()
+        if result["ms"] > IMPORT_BUDGET_MS
+    }
+    assert over_budget == {}
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork")
+def test_lazy_imports(import_results):
+    eager_imports = {
+        module_name: result["lazy"]
+        for module_name, result in import_results.items()
+        if result["lazy"]
+    }
+    assert eager_imports == {}
@@ -0,0 +1,131 @@
+import json
+import subprocess
+import sys
+from os.path import dirname, join
+
+# Crawls summ_developmental_disabilities with responses replayed from test files,
+# stopping gracefully or closing the spider with a reason after a number of responses
+# if one is given
+CRAWL_SCRIPT = """
+import re
+import sys
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.http import HtmlResponse, TextResponse
+
+from city_scrapers.spiders.summ_developmental_disabilities import (
+    SummDevelopmentalDisabilitiesSpider,
+)
+
+files_dir, jobdir, output_path, stop_after, stop_reason = sys.argv[1:]
+
+
+class ReplayMiddleware:
+    def process_request(self, request, spider):
+        if "admin-ajax" in request.url:
+            start = re.search(r"(?<=start=)[\\d-]+", request.url).group()
+            body = '[{{"url": "/resources/events/meeting-{}/"}}]'.format(start)
+            return TextResponse(request.url, body=body.encode(), request=request)
+        if "/resources/events/" in request.url:
+            year, month = re.search(r"(\\d{4})-(\\d{2})", request.url).groups()
+            with open(files_dir + "/summ_developmental_disabilities_detail.html") as f:
+                body = f.read().replace("09.26.2019", month + ".26." + year)
+        else:
+            with open(files_dir + "/summ_developmental_disabilities_links.html") as f:
+                body = f.read()
+        return HtmlResponse(request.url, body=body.encode(), request=request)
+
+
+class StopExtension:
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.count = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ext = cls(crawler)
+        crawler.signals.connect(ext.response_received, signals.response_received)
+        return ext
+
+    def response_received(self, response, request, spider):
+        self.count += 1
+        if self.count == int(stop_after):
+            from twisted.internet import reactor
+
+            if stop_reason == "shutdown":
+                reactor.callLater(0, self.crawler.stop)
+            else:
+                reactor.callLater(
+                    0, self.crawler.engine.close_spider, spider, stop_reason
+                )
+
+
+process = CrawlerProcess(
+    {
+        "JOBDIR": jobdir,
+        "FEEDS": {output_path: {"format": "jsonlines"}},
+        "CONCURRENT_REQUESTS": 1,
+        "LOG_LEVEL": "ERROR",
+        "DOWNLOADER_MIDDLEWARES": {"__main__.ReplayMiddleware": 1},
+        "SPIDER_MIDDLEWARES": {
+            "city_scrapers.middleware.CityScrapersJobStateMiddleware": 50
+        },
+        "EXTENSIONS": {"__main__.StopExtension": 0},
+        "STATS_DUMP": False,
+    }
+)
+crawler = process.create_crawler(SummDevelopmentalDisabilitiesSpider)
+process.crawl(crawler)
+process.start()
+print(crawler.stats.get_value("response_received_count", 0))
+"""
+
+files_dir = join(dirname(__file__), "files")
+
+
+def crawl(tmp_path, jobdir, output_name, stop_after=0, stop_reason="shutdown"):
+    output_path = str(tmp_path / output_name)
+    response_count = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            CRAWL_SCRIPT,
+            files_dir,
+            str(tmp_path / jobdir),
+            output_path,
+            str(stop_after),
+            stop_reason,
+        ],
+        cwd=dirname(dirname(__file__)),
+    )
+    with open(output_path) as f:
+        items = [json.loads(line) for line in f]
+    return int(response_count), items
+
+
+def test_resume(tmp_path):
+    full_responses, full_items = crawl(tmp_path, "full", "full.json")
+    stopped_responses, stopped_items = crawl(tmp_path, "job", "stopped.json", 13)
+    resumed_responses, resumed_items = crawl(tmp_path, "job", "resumed.json")
+
+    assert len(full_items) == 6
+    assert 0 < len(stopped_items) < len(full_items)
+    # Resuming only runs the requests that were outstanding when the crawl stopped
+    assert stopped_responses + resumed_responses == full_responses
+    assert sorted(stopped_items + resumed_items, key=lambda i: i["id"]) == sorted(
+        full_items, key=lambda i: i["id"]
+    )
+
+
+def test_finished_clears_state(tmp_path):
+    crawl(tmp_path, "job", "first.json")
+    _, items = crawl(tmp_path, "job", "second.json")
+    assert len(items) == 6
+
+
+def test_closed_clears_state(tmp_path):
+    # Spiders closed by CLOSESPIDER_TIMEOUT or errors start over on the next run
+    _, stopped_items = crawl(tmp_path, "job", "stopped.json", 13, "closespider_timeout")
+    _, items = crawl(tmp_path, "job", "second.json")
+    assert len(stopped_items) < len(items) == 6
@@ -0,0 +1,596 @@
+import os
+import time
+from collections import deque
+from os.path import dirname, join
+from unittest.mock import Mock
+
+import pytest
+from city_scrapers_core.constants import PASSED, TENTATIVE
+from city_scrapers_core.utils import file_response
+from freezegun import freeze_time
+from scrapy import Request
+from scrapy.core import spidermw
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest
+from scrapy.http import HtmlResponse, TextResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.internet.error import TCPTimedOutError
+from twisted.python.failure import Failure
+
+from city_scrapers.middleware import (
+    CityScrapersChangeDetectionMiddleware,
+    CityScrapersCircuitBreakerMiddleware,
+    CityScrapersDomainSlotMiddleware,
+    CityScrapersProxyMiddleware,
+    CityScrapersReplayMiddleware,
+    CityScrapersRobotsTxtMiddleware,
+    CityScrapersSharedResponseMiddleware,
+    CityScrapersWaybackMiddleware,
+    ResponseUnchanged,
+    SourceUnchanged,
+)
+from city_scrapers.spiders.akr_city_council import AkrCityCouncilSpider
+from city_scrapers.spiders.akr_city_council_committees import (
+    AkrCityCouncilCommitteesSpider,
+)
+from city_scrapers.spiders.summ_board_health import SummBoardHealthSpider
+
+proxy_middleware = CityScrapersProxyMiddleware(
+    domain_proxies={"yourmetrobus.org": "http://127.0.0.1:3128", "scph.org": None}
+)
+
+
+def test_proxy_domain():
+    request = Request("http://www.yourmetrobus.org/metro-board-meetings.aspx")
+    proxy_middleware.process_request(request, None)
+    assert request.meta["proxy"] == "http://127.0.0.1:3128"
+
+
+def test_proxy_other_domain():
+    for url in ["https://www.akronohio.gov/", "https://www.scph.org/"]:
+        request = Request(url)
+        proxy_middleware.process_request(request, None)
+        assert "proxy" not in request.meta
+
+
+def test_proxy_spider():
+    middleware = CityScrapersProxyMiddleware(proxy="http://proxy:8080")
+    request = Request("https://www.akronohio.gov/")
+    middleware.process_request(request, None)
+    assert request.meta["proxy"] == "http://proxy:8080"
+
+
+def test_proxy_existing_meta():
+    request = Request("http://yourmetrobus.org/", meta={"proxy": None})
+    proxy_middleware.process_request(request, None)
+    assert request.meta["proxy"] is None
+
+
+def get_change_detection_run(tmp_path):
+    crawler = get_crawler(settings_dict={"CITY_SCRAPERS_CHANGE_DIR": str(tmp_path)})
+    middleware = CityScrapersChangeDetectionMiddleware.from_crawler(crawler)
+    spider = SummBoardHealthSpider()
+    middleware.spider_opened(spider)
+    request = list(middleware.process_start_requests(spider.start_requests(), spider))[
+        0
+    ]
+    return crawler, middleware, spider, request
+
+
+def get_change_detection_response(request, status=200, headers=None):
+    with open(join(dirname(__file__), "files", "summ_board_health.html"), "rb") as f:
+        body = f.read() if status == 200 else b""
+    return HtmlResponse(
+        request.url, status=status, headers=headers, body=body, request=request
+    )
+
+
+@freeze_time("2018-12-01")
+def run_change_detection_crawl(tmp_path, headers=None):
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    response = get_change_detection_response(request, headers=headers)
+    middleware.process_spider_input(response, spider)
+    items = list(
+        middleware.process_spider_output(response, spider.parse(response), spider)
+    )
+    middleware.spider_closed(spider, "finished")
+    return items
+
+
+def test_change_detection_not_modified(tmp_path):
+    items = run_change_detection_crawl(tmp_path, headers={"ETag": '"abc"'})
+    assert items[0]["status"] == TENTATIVE
+
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    assert request.headers["If-None-Match"] == b'"abc"'
+    response = get_change_detection_response(request, status=304)
+    with pytest.raises(SourceUnchanged):
+        middleware.process_spider_input(response, spider)
+    with freeze_time("2019-10-03"):
+        replayed_items = list(
+            middleware.process_spider_exception(
+                response, SourceUnchanged(request.url), spider
+            )
+        )
+    assert [item["id"] for item in replayed_items] == [item["id"] for item in items]
+    assert replayed_items[0]["status"] == PASSED
+    assert crawler.stats.get_value("change_detection/unchanged_count") == 1
+    assert crawler.stats.get_value("change_detection/item_count") == len(items)
+
+
+def test_change_detection_same_body(tmp_path):
+    run_change_detection_crawl(tmp_path)
+
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    assert "If-None-Match" not in request.headers
+    with pytest.raises(SourceUnchanged):
+        middleware.process_spider_input(get_change_detection_response(request), spider)
+
+
+def test_change_detection_changed(tmp_path):
+    run_change_detection_crawl(tmp_path)
+
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    response = get_change_detection_response(request)
+    response = response.replace(body=response.body + b"<p>Updated</p>")
+    assert middleware.process_spider_input(response, spider) is None
+
+
+def test_change_detection_not_saved_after_error(tmp_path):
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    middleware.process_spider_input(get_change_detection_response(request), spider)
+    crawler.stats.inc_value("log_count/ERROR")
+    middleware.spider_closed(spider, "finished")
+    assert not list(tmp_path.iterdir())
+
+
+def scrape_change_detection(manager, response, output, spider):
+    """Run a response through the spider middleware chain like the scraper does,
+    returning Failures like a request without an errback"""
+    results = []
+    manager.scrape_response(
+        lambda result, request, spider: (
+            result if isinstance(result, Failure) else output
+        ),
+        response,
+        response.request,
+        spider,
+    ).addCallback(results.extend)
+    return results
+
+
+def test_change_detection_failed_follow_up(tmp_path, monkeypatch):
+    run_change_detection_crawl(tmp_path)
+
+    # Call the chain immediately instead of on the next reactor iteration
+    monkeypatch.setattr(spidermw, "mustbe_deferred", maybeDeferred)
+
+    crawler = get_crawler(
+        SummBoardHealthSpider,
+        settings_dict={
+            "CITY_SCRAPERS_CHANGE_DIR": str(tmp_path),
+            "SPIDER_MIDDLEWARES": {
+                "city_scrapers.middleware.CityScrapersChangeDetectionMiddleware": 45
+            },
+        },
+    )
+    spider = crawler._create_spider()
+    manager = spidermw.SpiderMiddlewareManager.from_crawler(crawler)
+    middleware = next(
+        mw
+        for mw in manager.middlewares
+        if isinstance(mw, CityScrapersChangeDetectionMiddleware)
+    )
+    middleware.spider_opened(spider)
+    request = list(middleware.process_start_requests(spider.start_requests(), spider))[
+        0
+    ]
+    response = get_change_detection_response(request)
+    response = response.replace(body=response.body + b"<p>Updated</p>")
+    detail_request = Request("https://www.scph.org/board-health/detail")
+    output = scrape_change_detection(manager, response, [detail_request], spider)
+    assert output == [detail_request]
+
+    # HttpErrorMiddleware drops the 404 before it reaches the spider
+    detail_response = HtmlResponse(
+        detail_request.url, status=404, request=detail_request
+    )
+    assert scrape_change_detection(manager, detail_response, [], spider) == []
+    middleware.spider_closed(spider, "finished")
+    assert crawler.stats.get_value("change_detection/incomplete_count") == 1
+
+    # The previous entry is kept, so the original page is still unchanged
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    with pytest.raises(SourceUnchanged):
+        middleware.process_spider_input(get_change_detection_response(request), spider)
+
+
+def test_change_detection_pending_follow_up(tmp_path):
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    response = get_change_detection_response(request)
+    middleware.process_spider_input(response, spider)
+    list(middleware.process_spider_output(response, [Request(request.url)], spider))
+    middleware.spider_closed(spider, "finished")
+
+    crawler, middleware, spider, request = get_change_detection_run(tmp_path)
+    assert middleware.process_spider_input(response, spider) is None
+
+
+def get_wayback_output(settings_dict=None):
+    crawler = get_crawler(settings_dict=settings_dict)
+    middleware = CityScrapersWaybackMiddleware.from_crawler(crawler)
+    spider = SummBoardHealthSpider()
+    response = get_change_detection_response(Request(spider.start_urls[0]))
+    items = list(spider.parse(response))
+    # Parsing the same page twice shouldn't submit its URLs again
+    output = list(middleware.process_spider_output(response, items, spider)) + list(
+        middleware.process_spider_output(response, items, spider)
+    )
+    return crawler, middleware, output
+
+
+def test_wayback_duplicates():
+    crawler, middleware, output = get_wayback_output()
+    requests = [value for value in output if isinstance(value, Request)]
+    assert len(output) - len(requests) == 18
+    assert len(requests) == len({request.url for request in requests})
+    assert crawler.stats.get_value("wayback/duplicate_count") == len(requests)
+
+
+def test_wayback_batch():
+    crawler, middleware, output = get_wayback_output({"WAYBACK_BATCH": True})
+    assert not any(isinstance(value, Request) for value in output)
+    crawler.engine = Mock()
+    pending_count = len(middleware.pending)
+    with pytest.raises(DontCloseSpider):
+        middleware.spider_idle(SummBoardHealthSpider())
+    assert crawler.engine.crawl.call_count == pending_count
+    assert middleware.pending == []
+    middleware.spider_idle(SummBoardHealthSpider())
+
+
+def run_replay_crawl(tmp_path, spider_cls, body_suffix=b""):
+    crawler = get_crawler(
+        spider_cls, settings_dict={"CITY_SCRAPERS_REPLAY_DIR": str(tmp_path)}
+    )
+    spider = crawler._create_spider()
+    middleware = CityScrapersReplayMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+    request = Request(spider.start_urls[0], callback=spider.parse, dont_filter=True)
+    response = file_response(
+        join(dirname(__file__), "files", "akr_city_council.html"), url=request.url
+    )
+    response = response.replace(request=request, body=response.body + body_suffix)
+    try:
+        middleware.process_spider_input(response, spider)
+        output = list(
+            middleware.process_spider_output(response, spider.parse(response), spider)
+        )
+    except ResponseUnchanged as e:
+        output = list(middleware.process_spider_exception(response, e, spider))
+    middleware.spider_closed(spider)
+    return crawler, output
+
+
+def summarize_output(output):
+    return [
+        (
+            (value.url, value.callback.__name__, value.cb_kwargs)
+            if isinstance(value, Request)
+            else dict(value)
+        )
+        for value in output
+    ]
+
+
+@freeze_time("2019-09-16")
+def test_replay(tmp_path):
+    _, output = run_replay_crawl(tmp_path, AkrCityCouncilSpider)
+    crawler, replayed = run_replay_crawl(tmp_path, AkrCityCouncilSpider)
+    assert any(isinstance(value, Request) for value in output)
+    assert summarize_output(replayed) == summarize_output(output)
+    assert crawler.stats.get_value("replay/hit_count") == 1
+    assert crawler.stats.get_value("replay/miss_count") is None
+
+
+def test_replay_changed(tmp_path):
+    run_replay_crawl(tmp_path, AkrCityCouncilSpider)
+    crawler, _ = run_replay_crawl(tmp_path, AkrCityCouncilSpider, body_suffix=b" ")
+    assert crawler.stats.get_value("replay/hit_count") is None
+    assert crawler.stats.get_value("replay/miss_count") == 1
+
+
+def test_replay_new_month(tmp_path):
+    class FixedUrlSpider(AkrCityCouncilSpider):
+        start_urls = ["https://onlinedocs.akronohio.gov/OnBaseAgendaOnline/Meetings"]
+
+    with freeze_time("2019-12-31"):
+        run_replay_crawl(tmp_path, FixedUrlSpider)
+        crawler, _ = run_replay_crawl(tmp_path, FixedUrlSpider)
+    assert crawler.stats.get_value("replay/hit_count") == 1
+
+    # Dates parsed without a year can change in a new month
+    with freeze_time("2020-01-01"):
+        crawler, _ = run_replay_crawl(tmp_path, FixedUrlSpider)
+    assert crawler.stats.get_value("replay/hit_count") is None
+    assert crawler.stats.get_value("replay/miss_count") == 1
+
+
+def test_replay_opt_out(tmp_path):
+    class NoReplaySpider(AkrCityCouncilSpider):
+        replay_responses = False
+
+    run_replay_crawl(tmp_path, NoReplaySpider)
+    crawler, _ = run_replay_crawl(tmp_path, NoReplaySpider)
+    assert crawler.stats.get_value("replay/hit_count") is None
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.fixture
+def shared_middlewares():
+    CityScrapersSharedResponseMiddleware.responses.clear()
+    CityScrapersSharedResponseMiddleware.in_flight.clear()
+    crawlers = [get_crawler(AkrCityCouncilSpider) for _ in range(2)]
+    yield [
+        CityScrapersSharedResponseMiddleware(crawler, ttl=60, domains=["akronohio.gov"])
+        for crawler in crawlers
+    ]
+    CityScrapersSharedResponseMiddleware.responses.clear()
+
+
+def test_shared_response(shared_middlewares):
+    first, second = shared_middlewares
+    url = "https://onlinedocs.akronohio.gov/OnBaseAgendaOnline/Meetings/Search"
+    first_request, second_request = Request(url), Request(url)
+    assert first.process_request(first_request, None) is None
+
+    waiting = second.process_request(second_request, None)
+    shared_responses = []
+    waiting.addCallback(shared_responses.append)
+    response = HtmlResponse(url, body=b"<p>Meetings</p>", request=first_request)
+    assert first.process_response(first_request, response, None) is response
+    assert shared_responses[0].body == response.body
+    assert "shared" in shared_responses[0].flags
+    assert second.process_response(second_request, shared_responses[0], None)
+
+    third_response = second.process_request(Request(url), None)
+    assert third_response.body == response.body
+    assert second.crawler.stats.get_value("sharedresponse/wait_count") == 1
+    assert second.crawler.stats.get_value("sharedresponse/hit_count") == 1
+
+
+def test_shared_response_request(shared_middlewares):
+    first, second = shared_middlewares
+    first_spider = AkrCityCouncilSpider()
+    second_spider = AkrCityCouncilCommitteesSpider()
+    url = "https://onlinedocs.akronohio.gov/OnBaseAgendaOnline/Meetings/Search"
+    first_request = Request(url, callback=first_spider.parse, meta={"page": 1})
+    waiting_request = Request(url, callback=second_spider.parse)
+    first.process_request(first_request, first_spider)
+    waiting = second.process_request(waiting_request, second_spider)
+    shared_responses = []
+    waiting.addCallback(shared_responses.append)
+    response = first.process_response(
+        first_request, HtmlResponse(url, body=b"<p>Meetings</p>"), first_spider
+    )
+    # The engine sets the request of responses returned by downloader middleware
+    response.request = first_request
+    assert shared_responses[0].request is waiting_request
+
+    second_request = Request(url, callback=second_spider.parse)
+    hit_response = second.process_request(second_request, second_spider)
+    assert hit_response.request is second_request
+    assert hit_response.request.callback == second_spider.parse
+    assert "page" not in hit_response.meta
+
+
+def test_shared_response_error(shared_middlewares):
+    first, second = shared_middlewares
+    url = "https://onlinedocs.akronohio.gov/OnBaseAgendaOnline/Meetings/Search"
+    request = Request(url)
+    first.process_request(request, None)
+    waiting = second.process_request(Request(url), None)
+    results = []
+    waiting.addCallback(results.append)
+    first.process_exception(request, Exception(), None)
+    assert results == [None]
+
+    request = Request(url)
+    first.process_request(request, None)
+    first.process_response(request, HtmlResponse(url, status=503), None)
+    assert second.process_request(Request(url), None) is None
+
+
+def test_shared_response_headers(shared_middlewares):
+    first, second = shared_middlewares
+    url = "https://www.akronohio.gov/"
+    assert first.process_request(Request(url), None) is None
+    request = Request(url, headers={"Cookie": "sucuri_cloudproxy=1"})
+    assert second.process_request(request, None) is None
+
+
+def test_shared_response_skipped(shared_middlewares):
+    first, second = shared_middlewares
+    for request in [
+        Request("https://www.summitkids.org/"),
+        Request("https://www.akronohio.gov/", dont_filter=True),
+        Request("https://www.akronohio.gov/", meta={"dont_cache": True}),
+    ]:
+        assert first.process_request(request, None) is None
+        assert "shared_response_key" not in request.meta
+        assert second.process_request(request.copy(), None) is None
+    assert CityScrapersSharedResponseMiddleware.in_flight == {}
+
+
+def test_shared_response_spill(shared_middlewares):
+    first, second = shared_middlewares
+    first.spill_size = 10
+    url = "https://www.akronohio.gov/cms/site/2387094f0d307b46/calendar.pdf"
+    request = Request(url)
+    first.process_request(request, None)
+    response = HtmlResponse(url, body=b"%PDF-1.4 agenda packet", request=request)
+    first.process_response(request, response, None)
+    [(_, stored_response, _)] = CityScrapersSharedResponseMiddleware.responses.values()
+    assert stored_response.body == b""
+    assert second.process_request(Request(url), None).body == response.body
+    assert first.crawler.stats.get_value("sharedresponse/spilled_count") == 1
+
+
+def get_domain_slot_middleware():
+    crawler = get_crawler()
+    crawler.engine = Mock()
+    crawler.engine.downloader.slots = {}
+    return CityScrapersDomainSlotMiddleware(
+        crawler,
+        {
+            "akronohio.gov": {"concurrency": 2, "delay": 1.0},
+            "onlinedocs.akronohio.gov": {"concurrency": 1, "delay": 2.0, "timeout": 60},
+        },
+    )
+
+
+def test_domain_slot_request():
+    middleware = get_domain_slot_middleware()
+    request = Request("https://onlinedocs.akronohio.gov/OnBaseAgendaOnline/")
+    middleware.process_request(request, None)
+    assert request.meta["download_slot"] == "onlinedocs.akronohio.gov"
+    assert request.meta["download_timeout"] == 60
+
+    request = Request("https://www.akronohio.gov/cms/", meta={"download_timeout": 5})
+    middleware.process_request(request, None)
+    assert request.meta["download_slot"] == "akronohio.gov"
+    assert request.meta["download_timeout"] == 5
+
+    request = Request("https://www.scph.org/board-health")
+    middleware.process_request(request, None)
+    assert "download_slot" not in request.meta
+
+
+def test_domain_slot_response():
+    middleware = get_domain_slot_middleware()
+    slot = Mock(delay=0.5)
+    middleware.crawler.engine.downloader.slots["akronohio.gov"] = slot
+    request = Request(
+        "https://www.akronohio.gov/cms/",
+        meta={"download_slot": "akronohio.gov", "download_latency": 0.25},
+    )
+    response = HtmlResponse(request.url, body=b"<p>Meetings</p>", request=request)
+    middleware.process_response(request, response, None)
+    assert slot.delay == 1.0
+    stats = middleware.crawler.stats
+    assert stats.get_value("slot/akronohio.gov/response_count") == 1
+    assert stats.get_value("slot/akronohio.gov/response_bytes") == len(response.body)
+    assert stats.get_value("slot/akronohio.gov/latency_seconds") == 0.25
+
+
+def get_robots_middleware(tmp_path):
+    crawler = get_crawler(
+        AkrCityCouncilSpider,
+        settings_dict={
+            "ROBOTSTXT_OBEY": True,
+            "CITY_SCRAPERS_ROBOTSTXT_DIR": str(tmp_path),
+            "CITY_SCRAPERS_ROBOTSTXT_TTL": 3600,
+        },
+    )
+    crawler.engine = Mock()
+    return CityScrapersRobotsTxtMiddleware(crawler)
+
+
+def test_robots_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(CityScrapersRobotsTxtMiddleware, "parsers", {})
+    spider = AkrCityCouncilSpider()
+    request = Request("https://www.akronohio.gov/private/page")
+    mw = get_robots_middleware(tmp_path)
+    mw._parsers["www.akronohio.gov"] = Deferred()
+    mw._parse_robots(
+        TextResponse(
+            "https://www.akronohio.gov/robots.txt",
+            body=b"User-agent: *\nDisallow: /private/",
+        ),
+        "www.akronohio.gov",
+        spider,
+    )
+    assert (tmp_path / "www.akronohio.gov.txt").exists()
+
+    CityScrapersRobotsTxtMiddleware.parsers.clear()
+    mw = get_robots_middleware(tmp_path)
+    parser = mw.robot_parser(request, spider)
+    assert not parser.allowed(request.url, "*")
+    assert mw.crawler.stats.get_value("robotstxt/cache_hit_count") == 1
+    mw.crawler.engine.download.assert_not_called()
+
+    CityScrapersRobotsTxtMiddleware.parsers.clear()
+    os.utime(tmp_path / "www.akronohio.gov.txt", (0, 0))
+    mw = get_robots_middleware(tmp_path)
+    mw.robot_parser(request, spider)
+    mw.crawler.engine.download.assert_called_once()
+
+
+@pytest.fixture
+def circuit_breaker(monkeypatch):
+    monkeypatch.setattr(CityScrapersCircuitBreakerMiddleware, "failures", {})
+    monkeypatch.setattr(CityScrapersCircuitBreakerMiddleware, "opened", {})
+    crawler = get_crawler(
+        AkrCityCouncilSpider,
+        settings_dict={
+            "CITY_SCRAPERS_CIRCUIT_BREAKER_THRESHOLD": 2,
+            "CITY_SCRAPERS_CIRCUIT_BREAKER_RESET": 60,
+        },
+    )
+    crawler.engine = Mock()
+    crawler.engine.downloader.slots = {}
+    return CityScrapersCircuitBreakerMiddleware.from_crawler(crawler)
+
+
+def test_circuit_breaker(circuit_breaker):
+    spider = AkrCityCouncilSpider()
+    request = Request("https://co.summitoh.net/index.php")
+    circuit_breaker.process_exception(request, TCPTimedOutError(), spider)
+    circuit_breaker.process_response(request, HtmlResponse(request.url), spider)
+    circuit_breaker.process_exception(request, TCPTimedOutError(), spider)
+    assert circuit_breaker.process_request(request, spider) is None
+
+    # Cached responses don't show the host is back up
+    cached_response = HtmlResponse(request.url, flags=["cached"])
+    circuit_breaker.process_response(request, cached_response, spider)
+    with pytest.raises(IgnoreRequest):
+        circuit_breaker.process_response(
+            request, HtmlResponse(request.url, status=503), spider
+        )
+    for _ in range(2):
+        with pytest.raises(IgnoreRequest):
+            circuit_breaker.process_request(request, spider)
+    assert (
+        circuit_breaker.process_request(Request("https://example.com"), spider) is None
+    )
+    stats = circuit_breaker.crawler.stats
+    assert stats.get_value("circuit_open") == 1
+    assert stats.get_value("circuit_breaker/dropped_count") == 3
+
+
+def test_circuit_breaker_queued(circuit_breaker):
+    spider = AkrCityCouncilSpider()
+    request = Request("https://co.summitoh.net/index.php")
+    queued = [
+        (Request(request.url + "?page={}".format(i)), Deferred()) for i in range(2)
+    ]
+    other = (Request("https://example.com"), Deferred())
+    slot = Mock(queue=deque([queued[0], other, queued[1]]))
+    circuit_breaker.crawler.engine.downloader.slots = {"co.summitoh.net": slot}
+    errors = []
+    for _, deferred in queued:
+        deferred.addErrback(errors.append)
+
+    circuit_breaker.process_exception(request, TCPTimedOutError(), spider)
+    with pytest.raises(IgnoreRequest):
+        circuit_breaker.process_exception(request, TCPTimedOutError(), spider)
+    assert list(slot.queue) == [other]
+    assert [error.type for error in errors] == [IgnoreRequest, IgnoreRequest]
+
+
+def test_circuit_breaker_reset(circuit_breaker):
+    spider = AkrCityCouncilSpider()
+    request = Request("https://co.summitoh.net/index.php")
+    CityScrapersCircuitBreakerMiddleware.opened["co.summitoh.net"] = time.time() - 120
+    assert circuit_breaker.process_request(request, spider) is None
+    assert "co.summitoh.net" not in CityScrapersCircuitBreakerMiddleware.opened
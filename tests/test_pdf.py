@@ -0,0 +1,67 @@
+import os
+from os.path import dirname, join
+
+import pytest  # noqa
+from scrapy.utils.test import get_crawler
+
+from city_scrapers.pdf import PdfTextCache, extract_text
+from city_scrapers.spiders.akr_planning import AkrPlanningSpider
+
+with open(join(dirname(__file__), "files", "akr_planning.pdf"), "rb") as f:
+    pdf_bytes = f.read()
+
+
+def get_spider(tmp_path, max_mb=10):
+    crawler = get_crawler(
+        AkrPlanningSpider,
+        settings_dict={
+            "CITY_SCRAPERS_PDF_CACHE_DIR": str(tmp_path),
+            "CITY_SCRAPERS_PDF_CACHE_MAX_MB": max_mb,
+        },
+    )
+    return crawler._create_spider()
+
+
+def test_extract_text_cache(tmp_path):
+    spider = get_spider(tmp_path)
+    text = extract_text(pdf_bytes, spider)
+    assert "Planning Commission" in text
+    assert extract_text(pdf_bytes, spider) == text
+    stats = spider.crawler.stats
+    assert stats.get_value("pdf/cache_miss_count") == 1
+    assert stats.get_value("pdf/cache_hit_count") == 1
+    assert stats.get_value("pdf/time_saved_seconds") > 0
+
+    extract_text(pdf_bytes, spider, line_margin=0.5)
+    assert stats.get_value("pdf/cache_miss_count") == 2
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_extract_text_evict(tmp_path):
+    spider = get_spider(tmp_path, max_mb=0.000001)
+    extract_text(pdf_bytes, spider)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_extract_text_evict_race(tmp_path, monkeypatch):
+    spider = get_spider(tmp_path, max_mb=0.000001)
+    listdir = os.listdir
+
+    def listdir_removed(path):
+        # Another process evicts the files after they are listed
+        filenames = listdir(path)
+        for filename in filenames:
+            os.remove(os.path.join(path, filename))
+        return filenames
+
+    monkeypatch.setattr(os, "listdir", listdir_removed)
+    assert "Planning Commission" in extract_text(pdf_bytes, spider)
+
+    monkeypatch.setattr(os, "listdir", listdir)
+    cache = PdfTextCache.from_crawler(spider.crawler)
+    monkeypatch.setattr(cache, "load_entry", lambda path: {"text": "", "seconds": 1})
+    assert cache.get_text(pdf_bytes, {}) == ""
+
+
+def test_extract_text_no_crawler():
+    assert extract_text(pdf_bytes) == extract_text(pdf_bytes, AkrPlanningSpider())
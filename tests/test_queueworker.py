@@ -0,0 +1,175 @@
+import json
+from argparse import Namespace
+
+import pytest  # noqa
+from scrapy.settings import Settings
+from twisted.internet import reactor, task
+
+from city_scrapers.commands import enqueue, queueworker
+from city_scrapers.history import CrawlHistory
+from city_scrapers.workqueue import DONE, LEASED, PENDING, SpiderQueue
+
+from .test_crawlall import FakeCrawlerProcess, get_command
+
+
+class ScenarioCrawlerProcess(FakeCrawlerProcess):
+    """Runs a scenario function in place of the reactor, finishing crawls on demand"""
+
+    def __init__(self, spider_names, scenario, stats=None):
+        super().__init__(spider_names, stats)
+        self.scenario = scenario
+
+    def start(self, stop_after_crawl=True):
+        self.scenario(self)
+
+    def finish(self, name):
+        self.running.pop(name).callback(None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = task.Clock()
+    monkeypatch.setattr(reactor, "callLater", clock.callLater)
+
+    def looping_call(f, *args, **kwargs):
+        call = task.LoopingCall(f, *args, **kwargs)
+        call.clock = clock
+        return call
+
+    monkeypatch.setattr(queueworker, "LoopingCall", looping_call)
+    return clock
+
+
+def make_queue(tmp_path, clock):
+    return SpiderQueue(
+        str(tmp_path / "queue.sqlite"),
+        lease_seconds=60,
+        max_attempts=3,
+        clock=lambda: 1000 + clock.seconds(),
+    )
+
+
+def get_states(queue):
+    return {job["spider"]: (job["state"], job["attempts"]) for job in queue.jobs()}
+
+
+def test_queueworker(tmp_path, monkeypatch, clock):
+    queue = make_queue(tmp_path, clock)
+    queue.put(["a", "b"])
+    # Another worker sharing the queue file
+    other = make_queue(tmp_path, clock)
+    monkeypatch.setattr(
+        queueworker.SpiderQueue, "from_settings", lambda settings, path=None: queue
+    )
+
+    def scenario(process):
+        assert process.started == ["a"]
+        assert other.lease("other") == "b"
+        # Heartbeats every third of the lease keep extending it
+        clock.advance(20)
+        clock.advance(20)
+        clock.advance(20)
+        assert other.lease("other") is None
+
+        process.finish("a")
+        assert get_states(other) == {"a": (DONE, 1), "b": (LEASED, 1)}
+        # The other worker died, so its lease on b expires before the next poll
+        clock.advance(10)
+        assert process.started == ["a", "b"]
+        assert get_states(other) == {"a": (DONE, 1), "b": (LEASED, 2)}
+
+        process.finish("b")
+        assert other.is_finished()
+
+    command = queueworker.Command()
+    command.settings = Settings()
+    command.crawler_process = ScenarioCrawlerProcess(["a", "b"], scenario)
+    command.run([], Namespace(queue=None, concurrency=1, poll_interval=10))
+
+    assert not command.heartbeat_loop.running
+    assert clock.getDelayedCalls() == []
+    jobs = other.jobs()
+    assert [job["state"] for job in jobs] == [DONE, DONE]
+    assert jobs[1]["worker"] == command.worker_id
+    assert jobs[1]["stats"] == {"finish_reason": "finished"}
+
+
+def test_queueworker_lost_lease(tmp_path, monkeypatch, clock, caplog):
+    queue = make_queue(tmp_path, clock)
+    queue.put(["a"])
+    other = make_queue(tmp_path, clock)
+    monkeypatch.setattr(
+        queueworker.SpiderQueue, "from_settings", lambda settings, path=None: queue
+    )
+
+    def scenario(process):
+        # Heartbeats stop reaching the queue, so the lease expires
+        monkeypatch.setattr(queue, "heartbeat", lambda worker, spider_name: False)
+        clock.advance(61)
+        assert other.lease("other") == "a"
+        assert "lost its lease on a" in caplog.text
+
+        # Stats of the first worker aren't saved over the new lease
+        process.finish("a")
+        assert get_states(other) == {"a": (LEASED, 2)}
+        other.complete("other", "a", {})
+        clock.advance(10)
+
+    command = queueworker.Command()
+    command.settings = Settings()
+    command.crawler_process = ScenarioCrawlerProcess(["a"], scenario)
+    command.run([], Namespace(queue=None, concurrency=1, poll_interval=10))
+    assert not command.heartbeat_loop.running
+    assert get_states(other) == {"a": (DONE, 2)}
+
+
+def get_enqueue_command(tmp_path):
+    history = CrawlHistory(str(tmp_path / "history.json"))
+    history.record({"a": {"elapsed_time_seconds": 10}})
+    history.record({"b": {"elapsed_time_seconds": 30}})
+    history.save()
+    command = get_command(
+        ["a", "b", "c"],
+        settings={
+            "CITY_SCRAPERS_HISTORY_FILE": history.path,
+            "CITY_SCRAPERS_QUEUE_LEASE": 60,
+            "CITY_SCRAPERS_QUEUE_MAX_ATTEMPTS": 3,
+        },
+        command_cls=enqueue.Command,
+    )
+    return command
+
+
+def get_enqueue_opts(tmp_path, **kwargs):
+    return Namespace(
+        **{
+            "queue": str(tmp_path / "queue.sqlite"),
+            "exclude": ["c"],
+            "status": False,
+            "stats_file": None,
+            **kwargs,
+        }
+    )
+
+
+def test_enqueue(tmp_path, capsys):
+    command = get_enqueue_command(tmp_path)
+    command.run([], get_enqueue_opts(tmp_path))
+    queue = SpiderQueue(str(tmp_path / "queue.sqlite"))
+    assert get_states(queue) == {"b": (PENDING, 0), "a": (PENDING, 0)}
+    assert [job["spider"] for job in queue.jobs()] == ["b", "a"]
+    assert "Queued 2 spiders" in capsys.readouterr().out
+
+    command.run([], get_enqueue_opts(tmp_path, status=True))
+    assert "b: pending, 0 attempts, worker None" in capsys.readouterr().out
+    assert command.exitcode == 1
+
+    for name in ["b", "a"]:
+        queue.lease("w1")
+        queue.complete("w1", name, {"item_scraped_count": 1})
+    command = get_enqueue_command(tmp_path)
+    stats_path = tmp_path / "stats.json"
+    command.run([], get_enqueue_opts(tmp_path, status=True, stats_file=str(stats_path)))
+    assert command.exitcode == 0
+    with open(stats_path) as f:
+        assert json.load(f) == {name: {"item_scraped_count": 1} for name in "ab"}
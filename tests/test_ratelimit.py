@@ -0,0 +1,62 @@
+import pytest  # noqa
+
+from city_scrapers import ratelimit
+from city_scrapers.ratelimit import DomainRateLimiter
+from city_scrapers.utils import match_domain
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+def test_reserve(tmp_path):
+    clock = Clock()
+    limiter = DomainRateLimiter(str(tmp_path), {"akronohio.gov": 2.0}, clock=clock)
+    assert limiter.reserve("akronohio.gov") == 0
+    assert limiter.reserve("akronohio.gov") == 0.5
+    assert limiter.reserve("akronohio.gov") == 1.0
+    clock.now += 10
+    assert limiter.reserve("akronohio.gov") == 0
+
+
+def test_reserve_shared(tmp_path):
+    clock = Clock()
+    limiters = [
+        DomainRateLimiter(str(tmp_path), {"co.summitoh.net": 1.0}, clock=clock)
+        for _ in range(2)
+    ]
+    assert limiters[0].reserve("co.summitoh.net") == 0
+    assert limiters[1].reserve("co.summitoh.net") == 1.0
+    assert limiters[0].reserve("co.summitoh.net") == 2.0
+
+
+def test_reserve_without_fcntl(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, "fcntl", None)
+    clock = Clock()
+    limiters = [
+        DomainRateLimiter(str(tmp_path), {"co.summitoh.net": 1.0}, clock=clock)
+        for _ in range(2)
+    ]
+    assert limiters[0].reserve("co.summitoh.net") == 0
+    assert limiters[1].reserve("co.summitoh.net") == 1.0
+
+
+def test_burst(tmp_path):
+    limiter = DomainRateLimiter(
+        str(tmp_path), {"akronohio.gov": 1.0}, burst=2, clock=Clock()
+    )
+    assert limiter.reserve("akronohio.gov") == 0
+    assert limiter.reserve("akronohio.gov") == 0
+    assert limiter.reserve("akronohio.gov") == 1.0
+
+
+def test_match_domain():
+    domains = ["www.akronohio.gov", "summitoh.net"]
+    assert match_domain("www.akronohio.gov", domains) == "www.akronohio.gov"
+    assert match_domain("onlinedocs.akronohio.gov", domains) is None
+    assert match_domain("sswcd.summitoh.net", domains) == "summitoh.net"
+    assert match_domain("notsummitoh.net", domains) is None
@@ -0,0 +1,57 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from scrapy.settings import Settings
+from scrapy.utils.misc import walk_modules
+from scrapy.utils.spider import iter_spider_classes
+
+from city_scrapers.commands import genspider
+from city_scrapers.spiderloader import (
+    ManifestSpiderLoader,
+    build_manifest,
+    get_manifest_path,
+)
+
+SPIDER_MODULE = "city_scrapers.spiders"
+
+loader = ManifestSpiderLoader(Settings({"SPIDER_MODULES": [SPIDER_MODULE]}))
+
+
+def test_manifest_current():
+    """Fails if the manifest needs to be regenerated with `scrapy manifest`"""
+    with open(get_manifest_path(SPIDER_MODULE)) as f:
+        assert json.load(f) == build_manifest(SPIDER_MODULE)
+
+
+def test_manifest_matches_spiders():
+    spider_names = {
+        spider_cls.name
+        for module in walk_modules(SPIDER_MODULE)
+        for spider_cls in iter_spider_classes(module)
+    }
+    assert set(loader.list()) == spider_names
+
+
+def test_load():
+    spider_cls = loader.load("akr_planning")
+    assert spider_cls.__name__ == "AkrPlanningSpider"
+    assert spider_cls.name == "akr_planning"
+
+
+def test_load_missing():
+    with pytest.raises(KeyError):
+        loader.load("missing")
+
+
+def test_genspider_writes_manifest(monkeypatch):
+    run = Mock()
+    manifest = Mock()
+    monkeypatch.setattr(genspider.GenSpiderCommand, "run", run)
+    monkeypatch.setattr(genspider, "write_manifest", manifest)
+    command = genspider.Command()
+    command.settings = Settings({"NEWSPIDER_MODULE": SPIDER_MODULE})
+    args = ["akr_example", "Akron Example", "https://www.akronohio.gov"]
+    command.run(args, None)
+    run.assert_called_once_with(args, None)
+    manifest.assert_called_once_with(SPIDER_MODULE)
@@ -6,6 +6,7 @@ import pytest  # noqa
 from city_scrapers_core.constants import BOARD, COMMITTEE, TENTATIVE
 from city_scrapers_core.utils import file_response
 from freezegun import freeze_time
+from scrapy import Request
 
 from city_scrapers.spiders.summ_children_services import SummChildrenServicesSpider
 
@@ -15,6 +16,14 @@ test_response = file_response(
         "https://www.summitkids.org/Community-Action/Calendar/ModuleID/426/ItemID/1005/mctl/EventDetails"  # noqa
     ),
 )
+test_documents_response = file_response(
+    join(dirname(__file__), "files", "summ_children_services_documents.html"),
+    url=SummChildrenServicesSpider.start_urls[0],
+)
+test_calendar_response = file_response(
+    join(dirname(__file__), "files", "summ_children_services_calendar.html"),
+    url="https://www.summitkids.org/Community-Action/Calendar",
+)
 spider = SummChildrenServicesSpider()
 
 freezer = freeze_time("2019-10-07")
@@ -80,3 +89,47 @@ def test_classification():
 
 def test_all_day():
     assert parsed_items[0]["all_day"] is False
+
+
+@freeze_time("2019-10-07")
+def test_parse_documents_calendar():
+    calendar_spider = SummChildrenServicesSpider()
+    calendar_spider.cookie = "sucuri_cloudproxy_uuid_0=1"
+    # parse only sets the cookie from the challenge page before fanning out
+    documents_request, calendar_request = calendar_spider.fan_out(
+        {
+            "documents": Request(test_documents_response.url),
+            "calendar": Request(test_calendar_response.url),
+        },
+        calendar_spider._parse_documents_calendar,
+    )
+    assert (
+        list(
+            calendar_request.callback(
+                test_calendar_response.replace(request=calendar_request)
+            )
+        )
+        == []
+    )
+    requests = list(
+        documents_request.callback(
+            test_documents_response.replace(request=documents_request)
+        )
+    )
+
+    assert [request.callback for request in requests] == [
+        calendar_spider._parse_calendar_response
+    ] * 6
+    assert b"__EVENTARGUMENT=V7122" in requests[0].body
+    assert b"__EVENTARGUMENT=V7275" in requests[-1].body
+    assert calendar_spider.link_date_map["October 2019"] == [
+        {
+            "title": "Minutes",
+            "href": "https://www.summitkids.org/Portals/0/Board/2019/October-2019-Board-Minutes.pdf",  # noqa
+        },
+        {
+            "title": "Resolutions",
+            "href": "https://www.summitkids.org/Portals/0/Board/2019/October-2019-Resolutions.pdf",  # noqa
+        },
+    ]
+    assert calendar_spider.fan_out_groups == {}
@@ -0,0 +1,78 @@
+from datetime import datetime
+from os.path import join
+
+import pytest  # noqa
+
+from city_scrapers.workqueue import DONE, FAILED, LEASED, PENDING, SpiderQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+def make_queue(tmp_path, clock):
+    queue = SpiderQueue(
+        join(tmp_path, "queue.sqlite"), lease_seconds=60, max_attempts=2, clock=clock
+    )
+    queue.put(["a", "b"])
+    return queue
+
+
+def get_states(queue):
+    return {job["spider"]: job["state"] for job in queue.jobs()}
+
+
+def test_lease_order(tmp_path):
+    queue = make_queue(tmp_path, Clock())
+    assert queue.lease("w1") == "a"
+    assert queue.lease("w2") == "b"
+    assert queue.lease("w1") is None
+    assert get_states(queue) == {"a": LEASED, "b": LEASED}
+
+
+def test_complete(tmp_path):
+    queue = make_queue(tmp_path, Clock())
+    queue.lease("w1")
+    queue.complete(
+        "w1", "a", {"item_scraped_count": 2, "start_time": datetime(2020, 1, 1)}
+    )
+    jobs = queue.jobs()
+    assert jobs[0]["state"] == DONE
+    assert jobs[0]["stats"] == {
+        "item_scraped_count": 2,
+        "start_time": "2020-01-01T00:00:00",
+    }
+    assert jobs[1]["state"] == PENDING
+    assert not queue.is_finished()
+
+
+def test_expired_lease(tmp_path):
+    clock = Clock()
+    queue = make_queue(tmp_path, clock)
+    queue.lease("w1")
+    queue.lease("w1")
+    clock.now += 30
+    assert queue.heartbeat("w1", "a")
+    clock.now += 45
+    # Lease on "b" expired without a heartbeat, but "a" was extended
+    assert queue.lease("w2") == "b"
+    assert not queue.heartbeat("w1", "b")
+    queue.complete("w1", "b", {})
+    assert get_states(queue) == {"a": LEASED, "b": LEASED}
+
+
+def test_max_attempts(tmp_path):
+    clock = Clock()
+    queue = make_queue(tmp_path, clock)
+    queue.put(["a"])
+    queue.lease("w1")
+    clock.now += 61
+    assert queue.lease("w2") == "a"
+    clock.now += 61
+    assert queue.is_finished()
+    assert queue.lease("w3") is None
+    assert get_states(queue) == {"a": FAILED}